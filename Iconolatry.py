@@ -2,14 +2,19 @@
 # -*- coding: utf-8 -*-
 
 from struct import unpack_from, pack, calcsize
-from PIL import Image, ImageCms
+from PIL import Image, ImageCms, ImageChops
+from os.path import isfile, splitext, abspath, isdir, join, basename, dirname, getmtime
+from os import listdir, replace, fdopen, remove
 from tempfile import mkstemp
-from os.path import isfile, splitext, abspath, isdir, join, basename
-from os import listdir
+from shutil import copymode
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
 from io import BytesIO
+from mmap import mmap, ACCESS_READ
+from hashlib import sha1
 import sys
 import argparse
-from functools import partial
+from functools import partial, lru_cache
 from itertools import chain
 
 __version__     = "2.0"
@@ -36,6 +41,221 @@ def calc_masksize(width):
         """ Computes number of bytes for AND mask. """
         return int((width + 32 - width % 32 if (width % 32) > 0 else width) / 8)
 
+def calc_table_abgr1555():
+        """ Computes lookup table for ABGR1555 channels unpacked by PIL. """
+        ## PIL expands 5-bit channels as (v * 255 / 31), remap them to
+        ## bit replication (v << 3 | v >> 2). Alpha bit is kept as is.
+        table = list(range(256))
+        for value in range(32):
+                table[value * 255 // 31] = (value << 3) | (value >> 2)
+        return table * 3 + list(range(256))
+
+table_abgr1555 = calc_table_abgr1555()
+## Alpha threshold for AND mask: only fully transparent pixels are masked.
+table_transparent = bytes([255] + [0] * 255)
+## Number of channels for each PNG color type.
+png_channels = {0 : 1, 2 : 3, 3 : 1, 4 : 2, 6 : 4}
+## Gray level (8-bit) to 2-bit / 4-bit index (top bits).
+table_gray2index = {2 : [value >> 6 for value in range(256)],
+                    4 : [value >> 4 for value in range(256)]}
+## Gray level (8-bit) to ABGR1555 (low byte, high byte): B = G = R = value >> 3, A = value >> 7.
+table_gray2abgr1555 = [[(((value & 0b11111000) << 2) | (value >> 3)) & 0xFF for value in range(256)],
+                       [(((value & 0b10000000) << 8) | ((value & 0b11111000) << 7) | ((value & 0b11111000) << 2)) >> 8 for value in range(256)]]
+## Conversions for PIL modes not writable (others to 'RGB', 'I;16*' to 'I').
+modes_unsupported = {'PA' : 'RGBA', 'RGBa' : 'RGBA', 'La' : 'LA', 'F' : 'I'}
+
+@lru_cache(maxsize = 256)
+def convert_palette(palette, bpp):
+        """ Converts a bitmap palette (bytes) to a PIL palette, cached by (palette, bpp).
+            Returns (is gray, PIL palette or None if not convertible, number of colors).
+        """
+        size_pal = len(palette)
+        paletteblocks = [palette[i : i + 3] for i in range(0, size_pal, 4)]
+        gray = all(elem == block[0] for block in paletteblocks for elem in block)
+        if not palette:
+                return gray, None, 0
+
+        palette_int = [palette[i : i + 3] for i in range(0, size_pal, 4)]
+        rsv = [palette[i + 3 : i + 4] for i in range(0, size_pal, 4)]
+
+        if (size_pal % 3 == 0) and (size_pal % 4 == 0):
+                if len(set(rsv)) <= 1:
+                        # palette RGBA.
+                        palette_int = [pal[i] for pal in palette_int for i in reversed(range(3))]
+                        num_pal = size_pal // 4
+                else:
+                        # palette RGB.
+                        palette_int = list(palette[::-1])
+                        num_pal = size_pal // 3
+        else:
+                if size_pal % 3 == 0:
+                        # palette RGB.
+                        palette_int = list(palette[::-1])
+                        num_pal = size_pal // 3
+                elif size_pal % 4 == 0:
+                        # palette RGBA.
+                        palette_int = [pal[i] for pal in palette_int for i in reversed(range(3))]
+                        num_pal = size_pal // 4
+                else:
+                        return gray, None, 0
+
+        ## PIL is wonky with next RGBA conversion,
+        ## if the palette isn't complete (768 values) for bilevel.
+        if bpp == 1 and gray:
+                # bilevel ('1' mode) pixels are 0 / 255.
+                pal = list(Image.new('1', (1, 1)).convert('P').palette.getdata()[1])
+                pal[:3], pal[-3:] = palette_int[:3], palette_int[-3:]
+                palette_int = pal
+
+        return gray, tuple(palette_int), num_pal
+
+## Fallback palettes (in package `palettes` folder) for images without palette.
+palettes_path = join(dirname(abspath(__file__)), 'palettes')
+palettes_fallback = {('1', 1) : '11.gpl',
+                     ('L', 2) : 'L2.gpl',
+                     ('L', 4) : 'L4.gpl',
+                     ('L', 8) : 'L8.gpl',
+                     ('P', 1) : 'P1.gpl',
+                     ('P', 2) : 'P2.gpl',
+                     ('P', 4) : 'P4.gpl',
+                     ('P', 8) : 'P8.gpl'}
+
+def read_gpl(path):
+        """ Gets RGB values (flat) from `.gpl` file. """
+        palette = []
+        with open(path, 'r') as fd:
+                for line in fd.readlines():
+                        if not line.lower().startswith(("gimp", "name", "columns", "#")):
+                                for pal in line.strip().split()[0:3]:
+                                        palette.append(int(pal))
+        return palette
+
+def pack_palette(values):
+        """ Packs RGB values (flat) to bitmap palette entries (RGBQUAD: B, G, R, 0). """
+        return bytes(chain(*[(values[i + 2], values[i + 1], values[i], 0) for i in range(0, len(values) - 2, 3)]))
+
+@lru_cache(maxsize = 64)
+def gpl_palette(path, mtime):
+        """ Gets packed palette of a `.gpl` file, cached by (path, modification time). """
+        return pack_palette(read_gpl(path))
+
+@lru_cache(maxsize = None)
+def fallback_palette(mode, bits):
+        """ Gets packed fallback palette for (mode, bits), parsed once. """
+        return pack_palette(read_gpl(join(palettes_path, palettes_fallback[(mode, bits)])))
+
+## Built ICC-to-sRGB transforms (None when profile already is sRGB), keyed by (profile digest, mode).
+icc_transforms = {}
+icc_transforms_max = 32
+icc_lock = Lock()
+
+@lru_cache(maxsize = None)
+def srgb_profile():
+        """ Gets sRGB profile, created once. """
+        return ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB'))
+
+def icc_to_srgb(image):
+        """ Converts image with embedded ICC profile to sRGB, reusing cached transforms. """
+        icc = image.info['icc_profile']
+        key = (sha1(icc).digest(), image.mode)
+        with icc_lock:
+                transform = icc_transforms.get(key, False)
+        if transform is False:
+                profile = ImageCms.ImageCmsProfile(BytesIO(icc))
+                if ImageCms.getProfileDescription(profile).strip().startswith('sRGB'):
+                        transform = None
+                else:
+                        # without cache, a transform can be applied by threads at once.
+                        transform = ImageCms.buildTransform(profile, srgb_profile(), image.mode, image.mode,
+                                                            flags = ImageCms.FLAGS['NOTCACHE'])
+                with icc_lock:
+                        if key not in icc_transforms and len(icc_transforms) >= icc_transforms_max:
+                                del icc_transforms[next(iter(icc_transforms))]
+                        icc_transforms[key] = transform
+
+        return ImageCms.applyTransform(image, transform) if transform else image
+
+## Bayer 4x4 threshold matrix (ordered dithering).
+bayer_matrix = [[0, 8, 2, 10], [12, 4, 14, 6], [3, 11, 1, 9], [15, 7, 13, 5]]
+
+@lru_cache(maxsize = 32)
+def bayer_plane(size, spread):
+        """ Gets Bayer thresholds (centered on 128, `spread` wide) tiled to `size`, as 'L' image. """
+        width, height = size
+        rows = [bytes(128 + (2 * value - 15) * spread // 32 for value in row) * (width // 4 + 1) for row in bayer_matrix]
+        return Image.frombytes('L', size, b"".join(rows[y % 4][: width] for y in range(height)))
+
+def dither_ordered(image, spread):
+        """ Adds Bayer thresholds to every band of an image (ordered dithering). """
+        plane = bayer_plane(image.size, spread)
+        return ImageChops.add(image, Image.merge(image.mode, [plane] * len(image.getbands())), 1.0, -128)
+
+def opaque_pixels(rgb, transparent):
+        """ Gets 'RGB' image with fully transparent pixels of `rgb` turned to color of first opaque one, so they take no palette entry. """
+        if not transparent:
+                return rgb
+        first = transparent.tobytes().find(0)
+        if first < 0:
+                return rgb
+        image = rgb.copy()
+        image.paste(rgb.getpixel((first % rgb.width, first // rgb.width)), mask = transparent)
+        return image
+
+def reduce_depth(image, bits, dither = None, palette = None):
+        """ Reduces an image to `bits` depth: 24 ('RGB') or 8, 4, 1 ('P'), with `dither` None or 'ordered' (Bayer).
+            Fully transparent pixels are turned to black; for 8 and 4, if palette has room, to a black entry
+            only used by them (index in info 'transparency').
+            `palette` is a 'P' image whose palette is reused (if None, a new one is quantized on opaque pixels).
+            Gets (reduced image, fully transparent pixels as 'L' mask or None, palette image).
+        """
+        image = image.convert('RGBA')
+        transparent = image.getchannel('A').point(list(table_transparent))
+        if not transparent.getextrema()[1]:
+                transparent = None
+        rgb = image.convert('RGB')
+        if transparent:
+                rgb.paste((0, 0, 0), mask = transparent)
+        if bits == 24:
+                return rgb, transparent, None
+
+        if bits == 1:
+                ## Monochrome, thresholded at half gray.
+                gray = rgb.convert('L')
+                if dither == 'ordered':
+                        gray = dither_ordered(gray, 255)
+                reduced = Image.frombytes('P', gray.size, gray.point([0] * 128 + [1] * 128).tobytes())
+                reduced.putpalette([0, 0, 0, 255, 255, 255])
+                palette = reduced
+        else:
+                if palette is None:
+                        ## A palette entry is left for transparent pixels.
+                        colors = (1 << bits) - (1 if transparent else 0)
+                        palette = Image.new('P', (1, 1))
+                        palette.putpalette(opaque_pixels(rgb, transparent).quantize(colors, method = Image.FASTOCTREE).getpalette()[: colors * 3])
+                if dither == 'ordered':
+                        # threshold spread of a level step (about cube root of colors per channel).
+                        rgb = dither_ordered(rgb, 255 // max(round((1 << bits) ** (1 / 3)) - 1, 1))
+                reduced = rgb.quantize(palette = palette, dither = Image.NONE)
+
+        if transparent:
+                values = palette.getpalette()
+                if bits > 1 and len(values) < 3 << bits:
+                        # black entry after palette.
+                        index = len(values) // 3
+                        reduced.putpalette(values + [0, 0, 0])
+                        reduced.info['transparency'] = index
+                else:
+                        # palette full, nearest to black (shared with opaque pixels).
+                        index = Image.new('RGB', (1, 1)).quantize(palette = palette, dither = Image.NONE).getpixel((0, 0))
+                reduced.paste(index, mask = transparent)
+        return reduced, transparent, palette
+
+def to_png(image, level = 9, **options):
+        """ Encodes PIL image to PNG bytes (`level` is zlib compression level). """
+        png = BytesIO()
+        image.save(png, format = 'PNG', compress_level = level, **options)
+        return png.getvalue()
+
 def print_err(msg, view = True, toexit = True):
         """ Handles stderr. """
         if view:
@@ -55,6 +275,43 @@ class EncodeErr(Exception):
         def __init__(self, **kwargs):
                 self.code, self.msg = kwargs['code'], kwargs['msg']
 
+class RawEntry(object):
+        """ Decoded entry as contiguous RGBA pixels, with `width`, `height`, `depth`, `hotspot`.
+            `data` is its buffer, a read-only `memoryview` (shape: height x width x 4, top-down rows):
+            `memoryview(entry.data)`, `numpy.asarray(entry.data)` and `numpy.asarray(entry)` share it without copy
+            (`memoryview(entry)` too, on Python >= 3.12).
+        """
+        def __init__(self, data, width, height, depth, hotspot = None):
+                self.data = memoryview(data).toreadonly().cast('B', (height, width, 4))
+                self.width, self.height, self.depth, self.hotspot = width, height, depth, hotspot
+
+        @classmethod
+        def from_image(cls, image, depth, hotspot = None):
+                if image.mode != 'RGBA':
+                        image = image.convert('RGBA')
+                return cls(image.tobytes(), image.width, image.height, depth, hotspot)
+
+        @property
+        def __array_interface__(self):
+                return {'shape'   : self.data.shape,
+                        'typestr' : '|u1',
+                        'data'    : self.data,
+                        'version' : 3}
+
+        def __buffer__(self, flags):
+                # buffer protocol (Python >= 3.12).
+                return self.data
+
+        def __reduce__(self):
+                # a memoryview doesn't pickle, its bytes do.
+                return (self.__class__, (self.data.obj, self.width, self.height, self.depth, self.hotspot))
+
+        def __len__(self):
+                return self.data.nbytes
+
+        def __repr__(self):
+                return '<RawEntry %sx%s depth=%s hotspot=%s>' %(self.width, self.height, self.depth, self.hotspot)
+
 
 ## ________
 ##| Parser |------------------------------------------------------------------------------------------------------------------------------------------------
@@ -81,7 +338,7 @@ def iconolatry_parser():
         """ CLI parser. """
         options = {}
         icon_parser = argparse.ArgumentParser(description = __summary__, epilog = 'version: ' + __version__)
-        icon_subparsers = icon_parser.add_subparsers(dest = 'mode', help = "Select if you want to read or to write an `.ico` / `.cur`.")
+        icon_subparsers = icon_parser.add_subparsers(dest = 'mode', help = "Select if you want to read, to inspect, to write or to optimize an `.ico` / `.cur`.")
 
         # Decode parser.
         dec_parser = icon_subparsers.add_parser('decode', add_help = False, allow_abbrev = False)
@@ -106,6 +363,51 @@ def iconolatry_parser():
         dec_optional.add_argument('-u', '--rebuild', action = 'store_true', default = False,
                                   dest = "rebuild",
                                   help = "Enable recompute AND mask.")
+        dec_optional.add_argument('-s', '--select', action = "store", default = None, type = tupledict,
+                                  dest = "select",
+                                  help = "Decode only the entry best matching (size, depth), example: \"(32, 32)\".")
+        dec_optional.add_argument('-j', '--jobs', action = "store", default = 1, type = int,
+                                  dest = "workers",
+                                  help = "Number of processes decoding files in parallel.")
+        dec_optional.add_argument('-c', '--force', action = "store", default = 'original', type = tupledict,
+                                  dest = "force_to",
+                                  help = "Bit depth of decoded images: 'original' or 24, 8, 4, 1.")
+        dec_optional.add_argument('-d', '--dither', action = "store", default = None, choices = ['ordered'],
+                                  dest = "dither",
+                                  help = "Dithering applied by bit depth reduction (Bayer).")
+        dec_optional.add_argument('-t', '--stats', action = 'store_true', default = False,
+                                  dest = "stats",
+                                  help = "Enable printing palette cache statistics (serial decoding only).")
+
+        # Inspect parser.
+        ins_parser = icon_subparsers.add_parser('inspect', add_help = False, allow_abbrev = False)
+        ins_parser.register('action', 'extend', ExtendAction)
+        ins_required = ins_parser.add_argument_group('required arguments')
+        ins_required.add_argument('-i', '--icocurs-paths', required = True, nargs = "+", action = "extend", default = [], type = str,
+                                  dest = "paths_icocurs",
+                                  help = "Path(s) of `.ico` / `.cur` file(s) or folder(s) to be inspected (headers only).")
+
+        ins_optional = ins_parser.add_argument_group('optional arguments')
+        ins_optional.add_argument('-h', '--help', action = "help", default = argparse.SUPPRESS,
+                                  help = "show this help message and exit")
+
+        # Optimize parser.
+        opt_parser = icon_subparsers.add_parser('optimize', add_help = False, allow_abbrev = False)
+        opt_parser.register('action', 'extend', ExtendAction)
+        opt_required = opt_parser.add_argument_group('required arguments')
+        opt_required.add_argument('-i', '--icocurs-paths', required = True, nargs = "+", action = "extend", default = [], type = str,
+                                  dest = "paths_icocurs",
+                                  help = "Path(s) of `.ico` / `.cur` file(s) or folder(s) to be rewritten in place.")
+
+        opt_optional = opt_parser.add_argument_group('optional arguments')
+        opt_optional.add_argument('-h', '--help', action = "help", default = argparse.SUPPRESS,
+                                  help = "show this help message and exit")
+        opt_optional.add_argument('-z', '--png-entries', action = "store", default = 'large', choices = ['large', 'all'],
+                                  dest = "png_entries",
+                                  help = "Bitmap entries recompressed to PNG (256 pixels only or all).")
+        opt_optional.add_argument('-l', '--png-level', action = "store", default = 9, type = int,
+                                  dest = "png_level",
+                                  help = "Compression level (0-9) of PNG entries.")
 
         # Encode parser.
         enc_parser = icon_subparsers.add_parser('encode', add_help = False, allow_abbrev = False)
@@ -129,13 +431,28 @@ def iconolatry_parser():
                                   help = "Format(s) of `.ico` / `.cur`(s) encoded.")
         enc_optional.add_argument('-r', '--resize', action = "store", default = 'up256_prop', type = tupledict,
                                   dest = "type_resize",
-                                  help = "Resize method (values) to apply during encoding.")
-        enc_optional.add_argument('-c', '--force', action = "store", default = 'raw', type = str,
+                                  help = "Resize method (values) to apply during encoding, 'ladder' or a list of sizes for a multi-size `.ico`.")
+        enc_optional.add_argument('-c', '--force', action = "store", default = 'original', type = tupledict,
                                   dest = "force_to",
-                                  help = "Bit depth conversion method to apply during encoding.")
+                                  help = "Bit depth to apply during encoding: 'original' or 24, 8, 4, 1.")
+        enc_optional.add_argument('-d', '--dither', action = "store", default = None, choices = ['ordered'],
+                                  dest = "dither",
+                                  help = "Dithering applied by bit depth reduction (Bayer).")
+        enc_optional.add_argument('-a', '--share-palette', action = 'store_true', default = False,
+                                  dest = "share_palette",
+                                  help = "Use palette of the first image for every image (frames of an animated cursor).")
         enc_optional.add_argument('-p', '--custom-palettes', action = "store", default = {}, type = tupledict,
                                   dest = "custom_palettes",
                                   help = "Palettes to apply during encoding.")
+        enc_optional.add_argument('-z', '--png-entries', action = "store", default = None, choices = ['large', 'all'],
+                                  dest = "png_entries",
+                                  help = "Entries stored PNG compressed (256 pixels only or all).")
+        enc_optional.add_argument('-l', '--png-level', action = "store", default = 9, type = int,
+                                  dest = "png_level",
+                                  help = "Compression level (0-9) of PNG entries.")
+        enc_optional.add_argument('-j', '--jobs', action = "store", default = 1, type = int,
+                                  dest = "workers",
+                                  help = "Number of processes encoding groups of images in parallel.")
 
         try:
                 options.update(vars(icon_parser.parse_args()))
@@ -225,6 +542,50 @@ class Check(object):
                 if check:
                         self.formats_checker(msg)
 
+def check_decode_options(rebuild, raw, force_to, dither, select):
+        """ Verifies decoding options, gets error message (None if ok). """
+        if not isinstance(rebuild, bool):
+                return "Input error: option 'rebuild' not a boolean."
+        if not isinstance(raw, bool):
+                return "Input error: option 'raw' not a boolean."
+        if force_to not in ['original', 24, 8, 4, 1] or isinstance(force_to, bool):
+                return "Input error: option 'force_to' not proper defined."
+        if dither not in [None, 'ordered']:
+                return "Input error: option 'dither' unknown '%s' value." %dither
+        if select is not None and not callable(select) and \
+           (not isinstance(select, (tuple, list)) or len(select) != 2 or \
+            not isinstance(select[0], int) or not isinstance(select[1], (int, type(None)))):
+                return "Input error: option 'select' neither a (size, depth) tuple nor a callable."
+
+def check_encode_options(type_resize, force_to, dither, share_palette, png_entries, png_level):
+        """ Verifies encoding options, gets error message (None if ok). """
+        if not isinstance(type_resize, (tuple, str, list)):
+                return "Input error: option `type_resize` not a tuple, a list or a string."
+        if isinstance(type_resize, tuple) and not (len(type_resize) == 2 \
+                                                   and all(isinstance(tyr, int) for tyr in [type_resize[0], type_resize[1]]) \
+                                                   and type_resize[0] <= 256 and type_resize[1] <= 256):
+                return "Input error: option `type_resize` tuple not proper defined."
+        elif isinstance(type_resize, str) and (type_resize not in ['up256_prop', 'up256_no_prop', 'square', 'ladder']):
+                return "Input error: option `type_resize` unknown '%s' method." %type_resize
+        elif isinstance(type_resize, list) and not (type_resize \
+                                                    and all((isinstance(size, int) and 0 < size <= 256) or \
+                                                            (isinstance(size, tuple) and len(size) == 2 and \
+                                                             all(isinstance(side, int) and 0 < side <= 256 for side in size))
+                                                            for size in type_resize)):
+                return "Input error: option `type_resize` list not proper defined."
+
+        if force_to not in ['original', 24, 8, 4, 1] or isinstance(force_to, bool):
+                return "Input error: option `force_to` not proper defined."
+        if dither not in [None, 'ordered']:
+                return "Input error: option `dither` unknown '%s' value." %dither
+        if not isinstance(share_palette, bool):
+                return "Input error: option `share_palette` not a boolean."
+
+        if png_entries not in [None, 'large', 'all']:
+                return "Input error: option `png_entries` unknown '%s' value." %png_entries
+        if not isinstance(png_level, int) or not 0 <= png_level <= 9:
+                return "Input error: option `png_level` not an integer in 0-9."
+
 
 ## _______________________
 ##| Read `.ico` / `.cur`  |----------------------------------------------------------------------------------------------------------------------------------
@@ -233,8 +594,8 @@ class Check(object):
 
 class Decode(object):
 
-        def __init__(self, paths_icocurs, paths_image = [], names_image = [], formats_image = [],
-                     rebuild = False, force_to = 'original'):
+        def __init__(self, paths_icocurs, paths_image = None, names_image = None, formats_image = None,
+                     rebuild = False, force_to = 'original', select = None, raw = False, workers = 1, dither = None):
 
                 """
                     `paths_icocurs`   : a list   : can contain one/more icon/cursor(s) path(s)
@@ -244,36 +605,54 @@ class Decode(object):
                     `names_image`     : a list   : contains output name(s) for every resulting conversion.
                     `formats_image`   : a list   : contains format(s) for every resulting conversion (all saving PIL formats).
                     `rebuild`         : a bool   : if 'True', recompute mask from the alpha channel data.
-                    `force_to`        : a string : if 'original', original bit depth is kept. (TODO)
+                    `force_to`        : a string : if 'original', original bit depth is kept.
+                                        an int     : if 24, 8, 4 or 1, decoded images are reduced to that bit depth
+                                                     (fully transparent pixels are black, for 8 and 4 transparent index).
+                    `select`          : a tuple  : (size, depth), decodes only the entry that best matches
+                                                   (smallest size not less than `size`, then deepest depth not over `depth`);
+                                                   `depth` can be None (deepest).
+                                        a callable : receives {'index', 'width', 'height', 'depth'} of every entry,
+                                                     decodes only entries for which returns True.
+                    `raw`             : a bool   : if 'True', every decoded entry gets also key 'raw', a `RawEntry`
+                                                   (RGBA buffer `data` + width, height, depth, hotspot).
+                    `workers`         : an int   : number of processes decoding files in parallel
+                                                   (results are shown / saved in input order, as with 1).
+                                                   With more than 1, a `select` callable must be picklable.
+                    `dither`          : a string : if 'ordered', Bayer dithering is applied when `force_to` is 8, 4 or 1.
                 """
 
                 self.paths_icocurs = paths_icocurs
-                self.paths_image = paths_image
-                self.formats_image = formats_image
-                self.names_image = names_image
+                self.paths_image = ([] if paths_image is None else paths_image)
+                self.formats_image = ([] if formats_image is None else formats_image)
+                self.names_image = ([] if names_image is None else names_image)
                 self.rebuild = rebuild
                 self.force_to = force_to
+                self.select = select
+                self.raw = raw
+                self.workers = workers
+                self.dither = dither
                 self.is_cli = is_cli
                 self.want_save = (False if all(x == [] for x in [self.paths_image, self.names_image, self.formats_image]) else True)
+                self.header_only = False
                 self.build()
 
         def is_png(self, dataimage):
                 """ Determines whether a sequence of bytes is a PNG. """
-                return dataimage.startswith(b'\x89PNG\r\n\x1a\n')
+                return dataimage[0 : 8] == b'\x89PNG\r\n\x1a\n'
 
         def is_gray(self):
                 """ Determines whether an image is grayscale (from palette). """
-                paletteblocks = [self.parameters['palette'][i : i + 3] for i in range(0, self.parameters['size_pal'], 4)]
-                if all(elem == block[0] for block in paletteblocks for elem in block):
-                        return True
-                else:
-                        return False
+                return convert_palette(self.parameters['palette'], self.parameters['bpp'])[0]
 
         def check_output(self):
                 """ Verifies if output paths, names, formats are ok. """
-                ## Check rebuild option.
-                if not isinstance(self.rebuild, bool):
-                        print_err("Input error: option 'rebuild' not a boolean.")
+                ## Check rebuild, raw, force_to, dither, select options.
+                msg = check_decode_options(self.rebuild, self.raw, self.force_to, self.dither, self.select)
+                if msg:
+                        print_err(msg)
+                ## Check workers option.
+                if not isinstance(self.workers, int) or isinstance(self.workers, bool) or self.workers < 1:
+                        print_err("Input error: option 'workers' not a positive integer.")
 
                 ## Checks paths.
                 Check(self.paths_icocurs, self.paths_image).paths("image")
@@ -296,28 +675,41 @@ class Decode(object):
                         self.remind = {}
                         self.all_icocur_readed = {}
 
-                        for self.index, self.path_icocur in enumerate(self.paths_icocurs):
-                                if isinstance(self.path_icocur, str):
-                                        if isfile(self.path_icocur):
-                                                self.work()
-                                        else:
-                                                if isdir(self.path_icocur):
-                                                        temp = self.path_icocur
-                                                        for file in sorted(listdir(self.path_icocur)):
-                                                                self.path_icocur = join(self.path_icocur, file)
-                                                                self.work()
-                                                                self.path_icocur = temp
-                                                else:
-                                                        self.all_icocur_readed.update({self.path_icocur : "Input error: file/directory not found."})
-                                elif isinstance(self.path_icocur, bytes):
-                                        self.data_icocur = self.path_icocur
-                                        self.path_icocur = "stream_%s" %self.index
-                                        self.work(is_byte = True)
-                                else:
-                                        self.all_icocur_readed.update({self.path_icocur : "Input error: neither a file/directory nor bytes."})
+                        if self.workers > 1:
+                                self.work_parallel()
+                        else:
+                                for is_byte in self.inputs():
+                                        if is_byte is not None:
+                                                self.work(is_byte = is_byte)
                 else:
                         print_err("Input error: `.ico` / `.cur` file path/s not a list.")
 
+        def inputs(self):
+                """ Walks input paths (folders expanded) and bytes, one at a time.
+                    Yields `False` for a file, `True` for bytes, `None` for an input error (stored in `all_icocur_readed`).
+                """
+                for self.index, self.path_icocur in enumerate(self.paths_icocurs):
+                        if isinstance(self.path_icocur, str):
+                                if isfile(self.path_icocur):
+                                        yield False
+                                else:
+                                        if isdir(self.path_icocur):
+                                                temp = self.path_icocur
+                                                for file in sorted(listdir(self.path_icocur)):
+                                                        self.path_icocur = join(temp, file)
+                                                        yield False
+                                                self.path_icocur = temp
+                                        else:
+                                                self.all_icocur_readed.update({self.path_icocur : "Input error: file/directory not found."})
+                                                yield None
+                        elif isinstance(self.path_icocur, bytes):
+                                self.data_icocur = memoryview(self.path_icocur)
+                                self.path_icocur = "stream_%s" %self.index
+                                yield True
+                        else:
+                                self.all_icocur_readed.update({self.path_icocur : "Input error: neither a file/directory nor bytes."})
+                                yield None
+
         def extract(self, dataimage, offset):
                 """ Gets bitmap parameters. """
                 # Should be:
@@ -343,9 +735,13 @@ class Decode(object):
                 if palettesize < 0:
                         palettesize = 0
 
-                palette = dataimage[biSize : biSize + palettesize]
-                xordata = dataimage[biSize + palettesize : biSize + palettesize + xorsize]
-                anddata = dataimage[biSize + palettesize + xorsize : len(dataimage)]
+                if self.header_only:
+                        palette, xordata, anddata = (b"" for _ in range(3))
+                else:
+                        # palette is small, so copied; xor & and are views into `dataimage`.
+                        palette = bytes(dataimage[biSize : biSize + palettesize])
+                        xordata = dataimage[biSize + palettesize : biSize + palettesize + xorsize]
+                        anddata = dataimage[biSize + palettesize + xorsize : len(dataimage)]
 
                 self.parameters = {"head"      : biSize,
                                    "width"     : biWidth,
@@ -364,6 +760,72 @@ class Decode(object):
                                    "and"       : anddata
                                    }
 
+        def extract_png(self, dataimage):
+                """ Gets PNG parameters (from IHDR chunk). """
+                ## (8bytes)signature - (4bytes)length - (4bytes)'IHDR' - (4bytes)width - (4bytes)height -
+                ## - (1byte)bitdepth - (1byte)colortype - (1byte)compression - (1byte)filter - (1byte)interlace.
+                width, height, bitdepth, colortype = unpack_from('>2L2B', dataimage, 16)
+
+                self.parameters = {"width"     : width,
+                                   "height"    : height,
+                                   "bpp"       : png_channels.get(colortype, 0) * bitdepth,
+                                   "num_pal"   : 0
+                                   }
+
+                if self.header_only and colortype == 3:
+                        ## Walk chunks headers until PLTE (it's always before IDAT).
+                        pos = 8
+                        while pos + 8 <= len(dataimage):
+                                length, chunk = unpack_from('>L4s', dataimage, pos)
+                                if chunk == b'PLTE':
+                                        self.parameters['num_pal'] = length // 3
+                                        break
+                                elif chunk in [b'IDAT', b'IEND']:
+                                        break
+                                pos += 12 + length
+
+        def peek_depth(self, offset):
+                """ Gets bit depth from image header (BITMAPINFOHEADER or PNG IHDR), without decoding. """
+                header = self.data_icocur[offset : offset + 26]
+                if self.is_png(header) and len(header) == 26:
+                        bitdepth, colortype = unpack_from('>2B', header, 24)
+                        return png_channels.get(colortype, 0) * bitdepth
+                elif len(header) >= 16:
+                        return unpack_from('<H', header, 14)[0]
+                return 0
+
+        def choose(self, icondirentries, identf):
+                """ Ranks ICONDIRENTRYs and gets indexes of entries to decode. """
+                if self.select is None:
+                        return range(len(icondirentries))
+
+                entries = []
+                for cnt, (bWidth, bHeight, bColorCount, bReserved,
+                          wPlanes_or_wXHotSpot, wBitCount_or_wYHotSpot, dWBytesInRes, dWImageOffset) in enumerate(icondirentries):
+                        # `.cur` has hotspot in place of bit count; `.ico` bit count can be 0.
+                        depth = (wBitCount_or_wYHotSpot if identf == 1 else 0) or self.peek_depth(dWImageOffset)
+                        entries.append({'index'  : cnt,
+                                        'width'  : bWidth or 256,
+                                        'height' : bHeight or 256,
+                                        'depth'  : depth})
+
+                if callable(self.select):
+                        return [entry['index'] for entry in entries if self.select(dict(entry))]
+
+                size, depth = self.select
+                def rank(entry):
+                        side = max(entry['width'], entry['height'])
+                        # smallest size not less than wanted (scaled down), otherwise biggest.
+                        by_size = ((0, side - size) if side >= size else (1, size - side))
+                        # deepest depth not over wanted, otherwise shallowest.
+                        if depth is None:
+                                by_depth = (0, -entry['depth'])
+                        else:
+                                by_depth = ((0, depth - entry['depth']) if entry['depth'] <= depth else (1, entry['depth'] - depth))
+                        return by_size + by_depth + (entry['index'],)
+
+                return ([min(entries, key = rank)['index']] if entries else [])
+
         def load(self):
                 """ Gets image from bytes. """
                 modes = {32 : ("RGBA", "BGRA"),
@@ -374,7 +836,8 @@ class Decode(object):
                          2  : ("P",    "P;2"),
                          1  : ("P",    "P;1")}
 
-                if self.is_gray():
+                gray, palette_int, num_pal = convert_palette(self.parameters['palette'], self.parameters['bpp'])
+                if gray:
                         modes.update({8 : ("L", "L"),
                                       4 : ("L", "L;4"),
                                       2 : ("L", "L;2"),
@@ -383,66 +846,30 @@ class Decode(object):
                 pad_msk = calc_masksize(self.parameters['width'])
 
                 if self.parameters['bpp'] == 16:
-                        # PIL I;16 converted to RGB555 format.
-                        pad_ima = calc_rowsize(24, self.parameters['width'])
-                        dataimage = []
-                        for i in range(0, len(self.parameters['xor']), 2):
-                                data = int.from_bytes(self.parameters['xor'][i : i + 2], byteorder = 'little')
-                                a = (data & 0x8000) >> 15
-                                b = (data & 0x7C00) >> 10
-                                g = (data & 0x3E0) >> 5
-                                r = (data & 0x1F)
-                                r = (r << 3) | (r >> 2)
-                                g = (g << 3) | (g >> 2)
-                                b = (b << 3) | (b >> 2)
-                                value = r << 16 | g << 8 | b
-                                dataimage.append((value).to_bytes(3, byteorder = 'little'))
-
-                        dataimage = b"".join(dataimage)
-                        image = Image.frombytes(modes[self.parameters['bpp']][0], (self.parameters['width'], self.parameters['height']),
-                                                dataimage, 'raw', modes[self.parameters['bpp']][1], pad_ima, -1)
+                        # ABGR1555 unpacked in bulk by PIL, then 5-bit channels rescaled as RGB555.
+                        pad_ima = calc_rowsize(16, self.parameters['width'])
+                        image = Image.frombuffer("RGBA", (self.parameters['width'], self.parameters['height']),
+                                                 self.parameters['xor'], 'raw', 'RGBA;15', pad_ima, -1)
+                        image = image.point(table_abgr1555)
+                        self.parameters['alpha'] = image.getchannel('A').convert('1')
                 else:
+                        # 'L' / 'P' (8 bpp) are mapped directly on the XOR view, others are unpacked from it.
                         pad_ima = calc_rowsize(self.parameters['bpp'], self.parameters['width'])
-                        image = Image.frombytes(modes[self.parameters['bpp']][0], (self.parameters['width'], self.parameters['height']),
-                                                self.parameters['xor'], 'raw', modes[self.parameters['bpp']][1], pad_ima, -1)
+                        image = Image.frombuffer(modes[self.parameters['bpp']][0], (self.parameters['width'], self.parameters['height']),
+                                                 self.parameters['xor'], 'raw', modes[self.parameters['bpp']][1], pad_ima, -1)
 
                 if self.parameters['bpp'] == 32:
-                        mask = Image.frombuffer("L", (self.parameters['width'], self.parameters['height']),
-                                                self.parameters['xor'][3::4], 'raw', 'L', 0, -1)
-                else:
-                        mask = Image.frombuffer("1", (self.parameters['width'], self.parameters['height']),
-                                                self.parameters['and'], 'raw', '1;I', pad_msk, -1)
+                        # alpha already unpacked from BGRA.
+                        return image
+
+                mask = Image.frombuffer("1", (self.parameters['width'], self.parameters['height']),
+                                        self.parameters['and'], 'raw', '1;I', pad_msk, -1)
 
                 if self.parameters['palette'] and self.parameters['bpp'] <= 8:
+                        if palette_int is None:
+                                raise ValueError("palette size not valid")
                         image = image.convert('P')
-                        palette_int = [self.parameters['palette'][i : i + 3] for i in range(0, self.parameters['size_pal'], 4)]
-                        rsv = [self.parameters['palette'][i + 3 : i + 4] for i in range(0, self.parameters['size_pal'], 4)]
-
-                        if (self.parameters['size_pal'] % 3 == 0) and (self.parameters['size_pal'] % 4 == 0):
-                                if len(set(rsv)) <= 1:
-                                        # palette RGBA.
-                                        palette_int = [pal[i] for pal in palette_int for i in reversed(range(3))]
-                                        self.parameters['num_pal'] = self.parameters['size_pal'] // 4
-                                else:
-                                        # palette RGB.
-                                        palette_int = [pal for pal in self.parameters['palette'][::-1]]
-                                        self.parameters['num_pal'] = self.parameters['size_pal'] // 3
-                        else:
-                                if self.parameters['size_pal'] % 3 == 0:
-                                        # palette RGB.
-                                        palette_int = [pal for pal in self.parameters['palette'][::-1]]
-                                        self.parameters['num_pal'] = self.parameters['size_pal'] // 3
-                                elif self.parameters['size_pal'] % 4 == 0:
-                                        # palette RGBA.
-                                        palette_int = [pal[i] for pal in palette_int for i in reversed(range(3))]
-                                        self.parameters['num_pal'] = self.parameters['size_pal'] // 4
-
-                        ## PIL is wonky with next RGBA conversion,
-                        ## if the palette isn't complete (768 values) for bilevel.
-                        if self.parameters['bpp'] == 1:
-                                pal = list(image.palette.getdata()[1])
-                                pal[:3], pal[-3:] = palette_int[:3], palette_int[-3:]
-                                palette_int = pal
+                        self.parameters['num_pal'] = num_pal
                         # Assign palette.
                         image.putpalette(palette_int)
 
@@ -452,7 +879,7 @@ class Decode(object):
                 return image
 
         def from_icocur(self):
-                """ Reads an `.ico` / `.cur` file and checks whether it's acceptable. """
+                """ Reads an `.ico` / `.cur` file and checks whether it's acceptable (gets error message, if isn't). """
                 def add_warning(dict_icocur, num, msg):
                         if 'warning' in dict_icocur['image_%s' %num]:
                                 dict_icocur['image_%s' %num]['warning'].append(msg)
@@ -463,12 +890,15 @@ class Decode(object):
                 typ = {1 : 'ICO',
                        2 : 'CUR'}
                 datasize = len(self.data_icocur)
-                identf, count = unpack_from('<2H', self.data_icocur[2 : 6])
+                identf, count = unpack_from('<2H', self.data_icocur, 2) if datasize >= 6 else (0, 0)
 
                 ## Control if it's a `.ico` / `.cur` type and extract values.
                 if identf not in [1, 2]:
-                        self.all_icocur_readed.update({self.path_icocur : "Icon/Cursor error: invalid `.ico` / `.cur`."})
-                        return
+                        return "Icon/Cursor error: invalid `.ico` / `.cur`."
+                elif count == 0:
+                        return "Icon/Cursor error: invalid %s, no images." %typ[identf]
+                elif datasize < 6 + 16 * count:
+                        return "Icon/Cursor error: invalid %s, unexpected EOF." %typ[identf]
                 else:
                         if identf == 1 and self.path_icocur.endswith('.cur'):
                                 msg = "Not a real `.cur` ! It's an icon with extension `.cur`."
@@ -478,7 +908,9 @@ class Decode(object):
                                 icocur_readed.update({'warning' : [msg]})
 
                 ## Note: always one frame for `.cur`.
-                icondirentries = [unpack_from('<4B2H2L', self.data_icocur[6 + 16 * i : 22 + 16 * i]) for i in range(count)]
+                icondirentries = [unpack_from('<4B2H2L', self.data_icocur, 6 + 16 * i) for i in range(count)]
+                ## Only selected entries are decoded and validated.
+                chosen = self.choose(icondirentries, identf)
 
                 for cnt in range(count):
                         # Should be:
@@ -486,8 +918,6 @@ class Decode(object):
                         # wBitCount = 0 (if not used)
                         # dwBytesInRes is the total number of bytes in the image data, including palette data
                         # dwImageOffset is offset from the beginning of the file to the image data
-                        icocur_readed.update({'image_%s' %cnt: {}})
-
                         bWidth, bHeight, bColorCount, bReserved, \
                                 wPlanes_or_wXHotSpot, wBitCount_or_wYHotSpot, dWBytesInRes, dWImageOffset = icondirentries[cnt]
                         bWidth = bWidth or 256
@@ -498,8 +928,16 @@ class Decode(object):
                         else:
                                 totalsize += dWBytesInRes
 
+                        if cnt not in chosen:
+                                continue
+                        icocur_readed.update({'image_%s' %cnt: {}})
+
                         icocurdata_with_header = self.data_icocur[dWImageOffset : dWImageOffset + dWBytesInRes]
                         png_flag = self.is_png(icocurdata_with_header)
+                        # BITMAPINFOHEADER / PNG signature and IHDR.
+                        if len(icocurdata_with_header) < (26 if png_flag else 40):
+                                icocur_readed.update({'image_%s' %cnt : "Image error: truncated header."})
+                                continue
 
                         if not png_flag:
                                 if bWidth >= 256 or bHeight >= 256:
@@ -508,9 +946,19 @@ class Decode(object):
                                 ## Get bmp parameters.
                                 self.extract(icocurdata_with_header, dWBytesInRes)
                                 ## Get mask and check it.
-                                self.parameters, chk = Mask().rebuild_AND_mask(icocurdata_with_header, self.parameters, self.rebuild)
-                                if not chk:
-                                        add_warning(icocur_readed, cnt, "Bad mask found ! Will display incorrectly in some places (Windows).")
+                                if not self.header_only:
+                                        needsize = self.parameters['head'] + self.parameters['size_pal'] + \
+                                                   self.parameters['size_xor'] + self.parameters['size_and']
+                                        if min(dWBytesInRes, len(icocurdata_with_header)) < needsize:
+                                                icocur_readed.update({'image_%s' %cnt : "Image error: truncated data."})
+                                                continue
+                                        try:
+                                                self.parameters, chk = Mask().rebuild_AND_mask(icocurdata_with_header, self.parameters, self.rebuild)
+                                        except Exception:
+                                                icocur_readed.update({'image_%s' %cnt : "Image error: malformed mask."})
+                                                continue
+                                        if not chk:
+                                                add_warning(icocur_readed, cnt, "Bad mask found ! Will display incorrectly in some places (Windows).")
 
                                 ## Other checks.
                                 try:
@@ -534,46 +982,55 @@ class Decode(object):
                                         icocur_readed.update({'image_%s' %cnt : "Image error: malformed %s." %e.args[0]})
                                         continue
 
-                                try:
-                                        image = self.load()
-                                        icocur_readed['image_%s' %cnt].update({'im_obj' : image,
-                                                                               'depth'  : self.parameters['bpp']})
-                                        if self.parameters['num_pal'] > 0:
-                                                icocur_readed['image_%s' %cnt].update({'num_pal' : self.parameters['num_pal']})
-                                except:
-                                        icocur_readed.update({'image_%s' %cnt : "Image error: image not supported."})
-                                        continue
+                                if self.header_only:
+                                        # palette entries are RGBQUAD.
+                                        self.parameters['num_pal'] = self.parameters['size_pal'] // 4
+                                else:
+                                        try:
+                                                image = self.load()
+                                                icocur_readed['image_%s' %cnt].update({'im_obj' : image,
+                                                                                       'depth'  : self.parameters['bpp']})
+                                                if self.parameters['num_pal'] > 0:
+                                                        icocur_readed['image_%s' %cnt].update({'num_pal' : self.parameters['num_pal']})
+                                                if 'alpha' in self.parameters:
+                                                        # 1-bit alpha of ABGR1555.
+                                                        icocur_readed['image_%s' %cnt].update({'alpha_obj' : self.parameters['alpha']})
+                                        except:
+                                                icocur_readed.update({'image_%s' %cnt : "Image error: image not supported."})
+                                                continue
 
                         elif png_flag:
-                                icocurdata = BytesIO(icocurdata_with_header)
-                                image = Image.open(icocurdata)
+                                ## Get png parameters.
+                                self.extract_png(icocurdata_with_header)
+
+                                ## Other checks.
+                                try:
+                                        assert bWidth == self.parameters['width'], ('width')
+                                        assert bHeight == self.parameters['height'], ('height')
+                                        if identf == 1:
+                                                assert wPlanes_or_wXHotSpot in [0, 1], ('planes')
+                                                assert (wBitCount_or_wYHotSpot == 0) or (wBitCount_or_wYHotSpot == self.parameters['bpp']), ('bits')
+                                                assert (bColorCount == 0) or (bColorCount == 1 << wBitCount_or_wYHotSpot), ('color count')
+                                        elif identf == 2:
+                                                assert bColorCount == 0, ('color count')
+                                except AssertionError as e:
+                                        icocur_readed.update({'image_%s' %cnt : "Image error: malformed %s." %e.args[0]})
+                                        continue
 
-                                if image:
-                                        w, h = image.size
-                                        icocurdata = icocurdata.getvalue()
-                                        bitdepth, colortype = unpack_from('<2B', icocurdata[24 : 26])
-                                        bpp = len(image.getbands()) * bitdepth
+                                icocur_readed['image_%s' %cnt].update({'info' : {'format' : "`png` compressed"}})
 
-                                        ## Other checks.
+                                if not self.header_only:
                                         try:
-                                                assert bWidth == w , ('width')
-                                                assert bHeight == h , ('height')
-                                                if identf == 1:
-                                                        assert wPlanes_or_wXHotSpot in [0, 1], ('planes')
-                                                        assert (wBitCount_or_wYHotSpot == 0) or (wBitCount_or_wYHotSpot == bpp), ('bits')
-                                                        assert (bColorCount == 0) or (bColorCount == 1 << wBitCount_or_wYHotSpot), ('color count')
-                                                elif identf == 2:
-                                                        assert bColorCount == 0, ('color count')
-                                        except AssertionError as e:
-                                                icocur_readed.update({'image_%s' %cnt : "Image error: malformed %s." %e.args[0]})
+                                                image = Image.open(BytesIO(icocurdata_with_header))
+                                                image.load()
+                                        except Exception:
+                                                icocur_readed.update({'image_%s' %cnt : "Image error: corrupted `png`."})
                                                 continue
-
-                                        icocur_readed['image_%s' %cnt].update({'info' : {'format' : "`png` compressed"}})
                                         if image.info:
                                                 icocur_readed['image_%s' %cnt]['info'].update(image.info)
 
                                         icocur_readed['image_%s' %cnt].update({'im_obj' : image,
-                                                                               'depth'  : bpp})
+                                                                               'depth'  : self.parameters['bpp']})
 
                                         if image.palette:
                                                 modepal, palette = image.palette.getdata()
@@ -587,13 +1044,39 @@ class Decode(object):
                                 icocur_readed.update({'image_%s' %cnt : "Image error: neither `bmp` nor `png`."})
                                 continue
 
+                        if self.header_only:
+                                icocur_readed['image_%s' %cnt].update({'width'  : self.parameters['width'],
+                                                                       'height' : self.parameters['height'],
+                                                                       'depth'  : self.parameters['bpp'],
+                                                                       'offset' : dWImageOffset,
+                                                                       'size'   : dWBytesInRes})
+                                if self.parameters['num_pal'] > 0:
+                                        icocur_readed['image_%s' %cnt].update({'num_pal' : self.parameters['num_pal']})
+
                         if identf == 2:
                                 icocur_readed['image_%s' %cnt].update({'hotspot_x' : wPlanes_or_wXHotSpot,
                                                                        'hotspot_y' : wBitCount_or_wYHotSpot})
 
+                        if self.force_to != 'original' and not self.header_only:
+                                entry = icocur_readed['image_%s' %cnt]
+                                try:
+                                        entry.update({'im_obj'    : reduce_depth(entry['im_obj'], self.force_to, self.dither)[0],
+                                                      'new_depth' : self.force_to})
+                                except Exception:
+                                        icocur_readed.update({'image_%s' %cnt : "Image error: can't force depth."})
+                                        continue
+
+                        if self.raw and not self.header_only:
+                                entry = icocur_readed['image_%s' %cnt]
+                                hotspot = ((entry['hotspot_x'], entry['hotspot_y']) if identf == 2 else None)
+                                try:
+                                        entry.update({'raw' : RawEntry.from_image(entry['im_obj'], entry['depth'], hotspot)})
+                                except Exception:
+                                        icocur_readed.update({'image_%s' %cnt : "Image error: can't get raw entry."})
+                                        continue
+
                 if datasize != totalsize:
-                        self.all_icocur_readed.update({self.path_icocur : "Icon/Cursor error: invalid %s, unexpected EOF." %typ[identf]})
-                        return
+                        return "Icon/Cursor error: invalid %s, unexpected EOF." %typ[identf]
 
                 return icocur_readed
 
@@ -626,7 +1109,12 @@ class Decode(object):
                                                 inf = ', '.join('{} = {}'.format(k, v) for k, v in subresult['info'].items())
                                                 self.print_std('info --> %s' %inf)
 
-                                        self.print_std('(width, height) = %s' %str(subresult['im_obj'].size))
+                                        if 'offset' in subresult:
+                                                # print image position (header only).
+                                                self.print_std('(offset, size) = %s' %str((subresult['offset'], subresult['size'])))
+                                                self.print_std('(width, height) = %s' %str((subresult['width'], subresult['height'])))
+                                        else:
+                                                self.print_std('(width, height) = %s' %str(subresult['im_obj'].size))
                                         self.print_std('depth = %s' %subresult['depth'])
 
                                         if 'num_pal' in subresult:
@@ -636,7 +1124,7 @@ class Decode(object):
                                                 # print `.cur` hotspots.
                                                 self.print_std('(hotspot_x, hotspot_y) = %s' %str((subresult['hotspot_x'], subresult['hotspot_y'])))
                                         # save.
-                                        if self.want_save or self.is_cli:
+                                        if (self.want_save or self.is_cli) and not self.header_only:
                                                 # define current path, name and format.
                                                 path, name, frmt = self.paths_image[self.index], \
                                                                    self.names_image[self.index], \
@@ -652,7 +1140,12 @@ class Decode(object):
                                                 current_name = (name + '_' + str(current_indx) if len(result) > 1 or couple in self.remind.keys() else name)
 
                                                 save_path = join(path, current_name + frmt)
-                                                subresult['im_obj'].save(save_path, format = frmt[1:].upper())
+                                                if 'rendered' in subresult:
+                                                        # already encoded by a worker.
+                                                        with open(save_path, 'wb') as file:
+                                                                file.write(subresult.pop('rendered'))
+                                                else:
+                                                        subresult['im_obj'].save(save_path, format = frmt[1:].upper())
                                                 subresult.update({'saved' : save_path})
                                                 self.print_std('saved as = %s' %save_path)
                                 else:
@@ -663,26 +1156,233 @@ class Decode(object):
                                                 self.print_err(subresult, toexit = False)
 
                         # remind last index bound to a specific path and name.
-                        if isinstance(subresult, dict):
+                        if isinstance(subresult, dict) and 'saved' in subresult:
                                 self.remind.update({couple : current_indx})
                 else:
                         self.print_err(result, toexit = False)
 
-        def work(self, is_byte = False):
-                """ Executes conversion job."""
+        def read(self, is_byte = False):
+                """ Parses current `.ico` / `.cur` (errors are stored in `all_icocur_readed`). """
+                mapped = None
                 if not is_byte:
                         if self.path_icocur.lower().endswith('.ico') or self.path_icocur.lower().endswith('.cur'):
+                                ## Map file: entries, xor & and data are views into it, not copies.
                                 with open(self.path_icocur, 'rb') as file:
-                                        self.data_icocur = file.read()
+                                        try:
+                                                mapped = mmap(file.fileno(), 0, access = ACCESS_READ)
+                                                self.data_icocur = memoryview(mapped)
+                                        except ValueError:
+                                                # empty file can't be mapped.
+                                                self.data_icocur = memoryview(b"")
                         else:
-                                print_err("Input error: not an `.ico` / `.cur` file.")
+                                self.all_icocur_readed.update({self.path_icocur : "Input error: not an `.ico` / `.cur` file."})
+                                return
+
+                try:
+                        ico_r = parse_icocur(self.data_icocur, self.path_icocur, rebuild = self.rebuild, select = self.select, raw = self.raw,
+                                             force_to = self.force_to, dither = self.dither, header_only = self.header_only)
+                finally:
+                        ## Drop view before unmapping.
+                        try:
+                                self.data_icocur.release()
+                                if mapped:
+                                        mapped.close()
+                        except BufferError:
+                                # still exported (error path), left to garbage collector.
+                                pass
+
+                if 'error' in ico_r:
+                        self.all_icocur_readed.update({self.path_icocur : ico_r['error']})
+                        return
+                return ico_r
 
-                ico_r = self.from_icocur()
+        def work(self, is_byte = False):
+                """ Executes conversion job."""
+                if not is_byte and not self.path_icocur.lower().endswith(('.ico', '.cur')):
+                        self.print_err("Input error: not an `.ico` / `.cur` file.")
+
+                ico_r = self.read(is_byte)
                 if ico_r:
                         self.all_icocur_readed.update({self.path_icocur : ico_r})
                         ## Show / save results.
                         self.printsave()
 
+        def work_parallel(self):
+                """ Executes conversion job for every input in a process pool,
+                    results are shown / saved serially in input order.
+                """
+                jobs, order = ([] for _ in range(2))
+                for is_byte in self.inputs():
+                        if is_byte is None:
+                                continue
+                        if not is_byte and not self.path_icocur.lower().endswith(('.ico', '.cur')):
+                                self.print_err("Input error: not an `.ico` / `.cur` file.")
+
+                        frmt = (self.formats_image[self.index] if self.want_save or self.is_cli else None)
+                        jobs.append((self.path_icocur, (self.paths_icocurs[self.index] if is_byte else None),
+                                     self.rebuild, self.select, self.raw, self.force_to, self.dither, frmt))
+                        order.append((self.index, self.path_icocur))
+                        # hold position of result, as in serial run.
+                        self.all_icocur_readed.setdefault(self.path_icocur, None)
+
+                with ProcessPoolExecutor(max_workers = self.workers) as executor:
+                        for (self.index, self.path_icocur), ico_r in zip(order, executor.map(decode_job, jobs)):
+                                if isinstance(ico_r, dict):
+                                        if ico_r:
+                                                self.all_icocur_readed.update({self.path_icocur : ico_r})
+                                                ## Show / save results.
+                                                self.printsave()
+                                        elif self.all_icocur_readed[self.path_icocur] is None:
+                                                del self.all_icocur_readed[self.path_icocur]
+                                else:
+                                        self.all_icocur_readed.update({self.path_icocur : ico_r})
+
+## ______________________________
+##| Inspect `.ico` / `.cur` only |--------------------------------------------------------------------------------------------------------------------------
+##|______________________________|
+##
+
+class Inspect(Decode):
+
+        def __init__(self, paths_icocurs):
+
+                """
+                    `paths_icocurs`   : a list   : can contain one/more icon/cursor(s) path(s)
+                                                   and/or one/more folder icon/cursor(s) path(s) to inspect.
+                                                   Only headers (ICONDIR, ICONDIRENTRY, BITMAPINFOHEADER, PNG IHDR) are parsed,
+                                                   no pixel data is decoded; results are in `all_icocur_readed`.
+                """
+
+                self.paths_icocurs = paths_icocurs
+                self.paths_image, self.names_image, self.formats_image = ([] for _ in range(3))
+                self.rebuild = False
+                self.force_to = 'original'
+                self.dither = None
+                self.select = None
+                self.raw = False
+                self.workers = 1
+                self.is_cli = is_cli
+                self.want_save = False
+                self.header_only = True
+                self.build()
+
+        def check_output(self):
+                """ Nothing to output, only reports. """
+                pass
+
+## ________________________
+##| Stream `.ico` / `.cur` |--------------------------------------------------------------------------------------------------------------------------------
+##|________________________|
+##
+
+class Stream(Decode):
+
+        def __init__(self, paths_icocurs, rebuild = False, sink = None, select = None, raw = False):
+
+                """
+                    `paths_icocurs`   : a list     : can contain one/more icon/cursor(s) path(s), bytes
+                                                     and/or one/more folder icon/cursor(s) path(s) to decode.
+                    `rebuild`         : a bool     : if 'True', recompute mask from the alpha channel data.
+                    `sink`            : a callable : called with every record (see `save_sink`);
+                                                     if it returns a path, record gets key 'saved'.
+                    `select`          : a tuple / callable : entries to decode (see `Decode`).
+                    `raw`             : a bool     : if 'True', records get also key 'raw' (see `Decode`).
+                    Iterating yields one record (a dict) per entry, only current file is held in memory.
+                """
+
+                self.paths_icocurs = paths_icocurs
+                self.paths_image, self.names_image, self.formats_image = ([] for _ in range(3))
+                self.rebuild = rebuild
+                self.force_to = 'original'
+                self.dither = None
+                self.select = select
+                self.raw = raw
+                self.is_cli = False
+                self.want_save = False
+                self.header_only = False
+                self.sink = sink
+
+        def __iter__(self):
+                if not isinstance(self.paths_icocurs, list):
+                        print_err("Input error: `.ico` / `.cur` file path/s not a list.")
+                msg = check_decode_options(self.rebuild, self.raw, self.force_to, self.dither, self.select)
+                if msg:
+                        print_err(msg)
+                if self.sink is not None and not callable(self.sink):
+                        print_err("Input error: option 'sink' not callable.")
+
+                self.all_icocur_readed = {}
+                for is_byte in self.inputs():
+                        if is_byte is not None:
+                                ico_r = self.read(is_byte)
+                                if ico_r is not None:
+                                        self.all_icocur_readed.update({self.path_icocur : ico_r})
+                        # forget previous file.
+                        result = self.all_icocur_readed.pop(self.path_icocur)
+                        yield from self.records(result)
+
+        def records(self, result):
+                """ Splits result of current file in records: {'path', 'entry', ...entry keys or 'error'}. """
+                if not isinstance(result, dict):
+                        yield self.drain({'path' : self.path_icocur, 'entry' : None, 'error' : result})
+                        return
+
+                # file warnings are reported with every entry.
+                warnings = result.pop('warning', [])
+                for key, subresult in result.items():
+                        record = {'path' : self.path_icocur, 'entry' : key}
+                        if isinstance(subresult, dict):
+                                record.update(subresult)
+                        else:
+                                record.update({'error' : subresult})
+                        if warnings:
+                                record.update({'warning' : warnings + record.get('warning', [])})
+                        yield self.drain(record)
+
+        def drain(self, record):
+                """ Passes record to sink. """
+                if self.sink:
+                        saved = self.sink(record)
+                        if saved:
+                                record.update({'saved' : saved})
+                return record
+
+def iter_decode(paths_or_bytes, rebuild = False, sink = None, select = None, raw = False):
+        """ Decodes `.ico` / `.cur` files / bytes lazily, yielding one record per entry. """
+        return iter(Stream(paths_or_bytes, rebuild = rebuild, sink = sink, select = select, raw = raw))
+
+def save_sink(path = '', frmt = '.png'):
+        """ Makes an `iter_decode` sink, saving every decoded entry in `path` as '<name>_<entry number><frmt>'. """
+        def sink(record):
+                if 'im_obj' in record:
+                        name = splitext(basename(record['path']))[0] + '_' + record['entry'].split('_')[-1]
+                        save_path = join(path or working_path, name + frmt)
+                        record['im_obj'].save(save_path, format = frmt[1:].upper())
+                        return save_path
+        return sink
+
+def decode_job(job):
+        """ Parses a `.ico` / `.cur` in a worker process; decoded images are also encoded to `frmt`, if given. """
+        path_icocur, data, rebuild, select, raw, force_to, dither, frmt = job
+        decoder = Stream([], rebuild = rebuild, select = select, raw = raw)
+        decoder.force_to, decoder.dither = force_to, dither
+        decoder.all_icocur_readed = {}
+        decoder.path_icocur = path_icocur
+        if data is not None:
+                decoder.data_icocur = memoryview(data)
+
+        ico_r = decoder.read(is_byte = data is not None)
+        if ico_r is None:
+                return decoder.all_icocur_readed.get(path_icocur)
+
+        if frmt:
+                for subresult in ico_r.values():
+                        if isinstance(subresult, dict) and 'im_obj' in subresult:
+                                buffer = BytesIO()
+                                subresult['im_obj'].save(buffer, format = frmt[1:].upper())
+                                subresult.update({'rendered' : buffer.getvalue()})
+        return ico_r
+
 ## __________________
 ##| Mask Operations  |--------------------------------------------------------------------------------------------------------------------------------------
 ##|__________________|
@@ -693,8 +1393,34 @@ class Mask(object):
             https://chromium.googlesource.com/chromium/src/+/master/tools/resources/ico_tools.py
         """
 
+        def threshold_alpha(self, width, height, xordata):
+                """ Gets alpha plane from 32-bit BGRA image data, as 255 where fully transparent and 0 elsewhere. """
+                return bytes(xordata[3 : width * height * 4 : 4]).translate(table_transparent)
+
         def compute_AND_mask(self, width, height, xordata):
                 """ Computes AND mask from 32-bit BGRA image data. """
+                ## Threshold alpha plane, then PIL packs bits with rows padded to 4 bytes.
+                mask = Image.frombytes('1', (width, height), self.threshold_alpha(width, height, xordata), 'raw', '1;8')
+                return mask.tobytes('raw', '1', calc_rowsize(1, width), 1)
+
+        def transparent_AND_mask(self, transparent):
+                """ Computes AND mask from 'L' image of fully transparent pixels (255). """
+                mask = transparent.convert('1', dither = Image.NONE)
+                return mask.tobytes('raw', '1', calc_rowsize(1, mask.size[0]), -1)
+
+        def check_AND_mask(self, width, height, xordata, anddata):
+                """ Verifies if AND mask is good for 32-bit BGRA image data.
+                    AND mask must be transparent exactly where alpha channel is fully transparent.
+                """
+                try:
+                        mask = Image.frombytes('1', (width, height), anddata, 'raw', '1', calc_rowsize(1, width), 1)
+                except ValueError:
+                        ## AND mask truncated.
+                        return False
+                return mask.tobytes('raw', 'L') == self.threshold_alpha(width, height, xordata)
+
+        def compute_AND_mask_py(self, width, height, xordata):
+                """ Computes AND mask from 32-bit BGRA image data (pure-Python reference). """
                 andbytes = []
                 for y in range(height):
                         bitcounter, currentbyte = (0 for _ in range(2))
@@ -719,8 +1445,8 @@ class Mask(object):
 
                 return andbytes
 
-        def check_AND_mask(self, width, height, xordata, anddata):
-                """ Verifies if AND mask is good for 32-bit BGRA image data.
+        def check_AND_mask_py(self, width, height, xordata, anddata):
+                """ Verifies if AND mask is good for 32-bit BGRA image data (pure-Python reference).
                     1- Checks if AND mask is opaque wherever alpha channel is not fully transparent.
                     2- Checks inverse rule, AND mask is transparent wherever alpha channel is fully transparent.
                 """
@@ -767,12 +1493,14 @@ class Mask(object):
 
 class Encode(object):
 
-        def __init__(self, paths_images, paths_icocur = [], names_icocur = [], formats_icocur = [],
-                     type_resize = 'up256_prop', force_to = 'original', custom_palettes = {}):
+        def __init__(self, paths_images, paths_icocur = None, names_icocur = None, formats_icocur = None,
+                     type_resize = 'up256_prop', force_to = 'original', custom_palettes = None, sink = None,
+                     png_entries = None, png_level = 9, workers = 1, dither = None, share_palette = False):
 
                 """
                     `paths_images`   : a list of lists   : every list can contain one/more image(s) path(s)
-                                                           and/or one/more folder image(s) path(s) to convert.
+                                                           and/or one/more folder image(s) path(s) to convert,
+                                                           and/or PIL images and/or image file bytes.
                     `paths_icocur`   : a list            : contains output path(s) for every resulting conversion.
                                                            If `paths_icocur` isn't defined, working directory is used.
                     `names_icocur`   : a list            : contains output name(s) for every resulting conversion.
@@ -786,20 +1514,45 @@ class Encode(object):
                                                            keeping / without keeping global image aspect ratio.
                                                            If used 'square', dimensions are resized to nearest square standard size.
                                                            Can be also provided a custom resize tuple (width, height).
-                    `force_to`       : a string          : If 'original', original bit depth is kept. (TODO)
+                                                           If used 'ladder' (or provided a list of sizes, as side or (width, height)),
+                                                           every image is written at all standard sizes not greater than it
+                                                           (or at listed sizes), keeping aspect ratio for sides: source is decoded
+                                                           and converted once, every size is resized from the previous one.
+                    `force_to`       : a string or int   : If 'original', original bit depth is kept.
+                                                           If 24, 8, 4 or 1, every entry is reduced to that bit depth
+                                                           (fully transparent pixels are kept with AND mask).
                     `custom_palettes`: a dict            : The key is a tuple (mode, bitdepth), the value can be
                                                            a list of RGB tuples [(R1,G1,B1),...,(Rn,Bn,Gn)] (usual palette format) or
                                                            a list flat [V1,V2,...,Vn] (compact format for grayscale palette) or
                                                            a '.gpl' file path.
+                    `sink`           : a file-like       : if defined, `.ico` / `.cur` data are written to it, instead of
+                                                           `paths_icocur` (`all_icocur_written` keys are still output paths).
+                    `png_entries`    : a string          : If 'large', entries of 256 pixels are stored PNG compressed;
+                                                           if 'all', every entry is; if None, every entry is stored as bitmap.
+                                                           (16 bpp entries are always stored as bitmap).
+                    `png_level`      : an int            : compression level (0-9) of PNG entries.
+                    `workers`        : an int            : number of processes encoding groups of `paths_images` in parallel
+                                                           (results are shown / saved in input order, with same names, as with 1).
+                                                           With more than 1, `sink` and `share_palette` can't be used.
+                    `dither`         : a string          : If 'ordered', Bayer dithering is applied when `force_to` is 8, 4 or 1;
+                                                           if None, colors are mapped to nearest.
+                    `share_palette`  : a bool            : If 'True', palette quantized for the first image is used for every image
+                                                           (frames of an animated cursor), otherwise only for all sizes of an image.
                 """
 
                 self.paths_images = paths_images
-                self.paths_icocur = paths_icocur
-                self.names_icocur = names_icocur
-                self.formats_icocur = formats_icocur
+                self.paths_icocur = ([] if paths_icocur is None else paths_icocur)
+                self.names_icocur = ([] if names_icocur is None else names_icocur)
+                self.formats_icocur = ([] if formats_icocur is None else formats_icocur)
                 self.type_resize = type_resize
                 self.force_to = force_to
-                self.custom_palettes = custom_palettes
+                self.custom_palettes = ({} if custom_palettes is None else custom_palettes)
+                self.sink = sink
+                self.png_entries = png_entries
+                self.png_level = png_level
+                self.workers = workers
+                self.dither = dither
+                self.share_palette = share_palette
                 self.is_cli = is_cli
                 self.build()
 
@@ -819,18 +1572,19 @@ class Encode(object):
         def check_output(self):
                 """ Verifies if output paths, names, formats are ok. """
                 ## Check other options.
-                if not isinstance(self.type_resize, (tuple, str)):
-                        print_err("Input error: option `type_resize` not a tuple or a string.")
-                else:
-                        if isinstance(self.type_resize, tuple) and not (len(self.type_resize) == 2 \
-                                                                        and all(isinstance(tyr, int) for tyr in [self.type_resize[0], self.type_resize[1]]) \
-                                                                        and self.type_resize[0] <= 256 and self.type_resize[1] <= 256):
-                                print_err("Input error: option `type_resize` tuple not proper defined.")
-                        elif isinstance(self.type_resize, str) and (self.type_resize not in ['up256_prop', 'up256_no_prop', 'square']):
-                                print_err("Input error: option `type_resize` unknown '%s' method." %self.type_resize)
+                msg = check_encode_options(self.type_resize, self.force_to, self.dither, self.share_palette, self.png_entries, self.png_level)
+                if msg:
+                        print_err(msg)
+
+                if self.sink is not None and not hasattr(self.sink, 'writelines'):
+                        print_err("Input error: option `sink` not a file-like object.")
 
-                if self.force_to not in ['original']:
-                        print_err("Input error: option `force_to` not proper defined.")
+                if not isinstance(self.workers, int) or isinstance(self.workers, bool) or self.workers < 1:
+                        print_err("Input error: option `workers` not a positive integer.")
+                elif self.workers > 1 and self.sink is not None:
+                        print_err("Input error: option `sink` can't be used with more than 1 `workers`.")
+                elif self.workers > 1 and self.share_palette:
+                        print_err("Input error: option `share_palette` can't be used with more than 1 `workers`.")
 
                 ## Check paths.
                 msg = "icon / cursor"
@@ -870,10 +1624,11 @@ class Encode(object):
                         self.check_output()
                         self.remind = {}
                         self.all_icocur_written = {}
+                        self.palettes = {}
+                        tasks = []
 
                         groups = zip(self.paths_images, self.paths_icocur, self.names_icocur, self.formats_icocur, self.hotspots)
                         for indx, (path_image, self.path_icocur, name, frmt, hotspot) in enumerate(groups):
-                                self.print_std('#' * 80)
                                 no_err, paths = True, []
 
                                 if isinstance(path_image, list):
@@ -882,7 +1637,10 @@ class Encode(object):
                                                 message = "Input error: image file/directory path/s missing."
                                         else:
                                                 for imapath in path_image:
-                                                        if not isinstance(imapath, str):
+                                                        if isinstance(imapath, (bytes, Image.Image)):
+                                                                # in-memory image.
+                                                                paths.append(imapath)
+                                                        elif not isinstance(imapath, str):
                                                                 no_err = False
                                                                 message = "Input error: image file/directory path '%s' not a string." %imapath
                                                         else:
@@ -895,7 +1653,10 @@ class Encode(object):
                                                                                 no_err = False
                                                                                 message = "Input error: file/directory '%s' not found." %imapath
 
-                                                if len(paths) > 1:
+                                                if frmt == '.cur' and self.is_ladder():
+                                                        no_err = False
+                                                        message = "Input error: can't create multi-size '.cur'."
+                                                elif len(paths) > 1:
                                                         if frmt == '.cur':
                                                                 if name != "":
                                                                         no_err = False
@@ -910,37 +1671,42 @@ class Encode(object):
                                         no_err = False
                                         message = "Input error: image file/directory path/s not a list of lists."
 
-                                ## Do job.
+                                ## Define output path (names as serial run).
                                 if name != "":
                                         self.add_name2path(name, frmt, indx)
                                 if not no_err:
                                         if name == "":
                                                 self.add_name2path('noname', frmt, indx)
-                                        self.add_errors(message)
+                                        tasks.append((self.path_icocur, None, name, frmt, hotspot, message))
                                 else:
-                                        self.work(paths, name, frmt, hotspot)
+                                        tasks.append((self.path_icocur, paths, name, frmt, hotspot, None))
+
+                        ## Do jobs.
+                        if self.workers > 1:
+                                self.work_parallel(tasks)
+                        else:
+                                for self.path_icocur, paths, name, frmt, hotspot, message in tasks:
+                                        self.print_std('#' * 80)
+                                        if message:
+                                                self.add_errors(message)
+                                        else:
+                                                self.work(paths, name, frmt, hotspot)
                 else:
                         print_err("Input error: image file/directory path/s not a list of lists.")
 
-        def convert_8bit_to_4bit(self, bits_8):
-                """ Converts 8-bit image data to 4-bit. """
-                bits_4 = []
-                for i in range(0, len(bits_8), 2):
-                        high = bits_8[i]     & 0b11110000
-                        low =  bits_8[i + 1] & 0b00001111
-                        bits_4 += [high | low]
-                return bytes(bits_4)
-
-        def convert_8bit_to_2bit(self, bits_8):
-                """ Converts 8-bit image data to 2-bit. """
-                bits_2 = []
-                for i in range(0, len(bits_8), 4):
-                        hh = bits_8[i]      & 0b11000000
-                        hl = bits_8[i + 1]  & 0b00110000
-                        lh = bits_8[i + 2]  & 0b00001100
-                        ll = bits_8[i + 3]  & 0b00000011
-                        bits_2 += [hh | hl | lh | ll]
-                return bytes(bits_2)
+        def pack_indexed(self, image, bits, pad):
+                """ Packs 'L' (top bits of gray) or 'P' (indexes) image data to 2-bit / 4-bit rows, bottom-up, `pad` bytes each. """
+                if image.mode == 'L':
+                        # gray levels to indexes, then packed as 'P'.
+                        indexes = image.point(table_gray2index[bits])
+                        image = Image.frombuffer('P', image.size, indexes.tobytes(), 'raw', 'P', 0, 1)
+                return image.tobytes('raw', 'P;%s' %bits, pad, -1)
+
+        def pack_abgr1555(self, image, pad):
+                """ Packs 'L' image data to 16-bit ABGR1555 rows (little-endian), bottom-up, `pad` bytes each. """
+                ## Low / high bytes of every pixel as separate bands.
+                image = Image.merge('LA', (image.point(table_gray2abgr1555[0]), image.point(table_gray2abgr1555[1])))
+                return image.tobytes('raw', 'LA', pad, -1)
 
         def convert_16bit_to_8bit(self, bits_16):
                 """ Converts 16-bit image data to 8-bit """
@@ -957,22 +1723,29 @@ class Encode(object):
                         dataimage = image.tobytes('raw', 'BGRA', pad, -1)
                 return dataimage
 
-        def extract(self, path):
-                """ Gets parameters input image. """
-                ## Open image in-memory as '.png'.
-                _, ext = splitext(path)
+        def extract(self, path, label):
+                """ Gets parameters input image (`path` can be also a PIL image or bytes). """
+                ## Open (and decode) image once.
+                _, ext = splitext(label)
+                data = None
                 try:
-                        image = Image.open(path, 'r')
-                except:
-                        raise EncodeErr(code = 1, msg = "Image error: format '%s' not recognized or corrupted." %ext)
-
-                imagebyte = BytesIO()
-                try:
-                        image.save(imagebyte, format = 'PNG')
+                        if isinstance(path, Image.Image):
+                                # resize is in-place, so keep caller image untouched.
+                                image = path.copy()
+                        else:
+                                if isinstance(path, bytes):
+                                        data = path
+                                else:
+                                        with open(path, 'rb') as file:
+                                                data = file.read()
+                                image = Image.open(BytesIO(data))
+                        image.load()
+
+                        ## Modes not writable to `.ico` / `.cur` converted.
+                        if image.mode not in ['1', 'L', 'I', 'P', 'LA', 'RGB', 'RGBA']:
+                                image = image.convert(modes_unsupported.get(image.mode, ('I' if image.mode.startswith('I;16') else 'RGB')))
                 except:
                         raise EncodeErr(code = 1, msg = "Image error: format '%s' not recognized or corrupted." %ext)
-                dataimage = imagebyte.getvalue()
-                image = Image.open(imagebyte)
 
                 self.parameters['bWidth'], self.parameters['bHeight'] = image.size
                 self.mode = image.mode
@@ -985,9 +1758,11 @@ class Encode(object):
                 ##  truecolor               3           8,16                24,48             2        each pixel is an R,G,B triple
                 ##  truecolor+alpha         4           8,16                32,64             6        each pixel is an R,G,B triple followed by an alpha sample
 
-                with open(path, 'rb') as file:
-                        data = file.read(30)
-                bitdepth, coltyp = unpack_from('<2B', data[24 : 26])
+                if data is not None and data[0 : 8] == b'\x89PNG\r\n\x1a\n' and image.format == 'PNG':
+                        # real bit depth from IHDR.
+                        bitdepth, coltyp = unpack_from('>2B', data, 24)
+                else:
+                        bitdepth, coltyp = self.mode_depth(image)
                 self.parameters['wBitCount'] = len(image.getbands()) * bitdepth
 
                 if coltyp == 4 and self.mode == 'RGBA':
@@ -1005,7 +1780,7 @@ class Encode(object):
                 except AssertionError:
                         raise EncodeErr(code = 2, msg = "Image error: malformed.")
 
-                dizio = {'file' : path,
+                dizio = {'file' : label,
                          'mode' : dict_colortype[coltyp][1],
                          'depth' : self.parameters['wBitCount']}
 
@@ -1016,22 +1791,75 @@ class Encode(object):
 
                 return image
 
-        def load(self, path_image):
-                """ Loads input image data. """
+        def palette_colors(self, image):
+                """ Gets number of palette entries of a 'P' image (as PIL PNG writer does). """
+                return (max(min(len(image.palette.getdata()[1]) // 3, 256), 1) if image.palette else 256)
+
+        def mode_depth(self, image):
+                """ Gets (bits per channel, PNG color type) of a PIL image mode, as would be written to PNG. """
+                if image.mode == 'P':
+                        # smallest depth holding all palette entries.
+                        colors = self.palette_colors(image)
+                        return next(bits for bits in [1, 2, 4, 8] if colors <= 1 << bits), 3
+                return {'1'    : (1, 0),
+                        'L'    : (8, 0),
+                        'I'    : (16, 0),
+                        'LA'   : (8, 4),
+                        'RGB'  : (8, 2),
+                        'RGBA' : (8, 6)}[image.mode]
+
+        def load(self, path_image, label):
+                """ Loads input image data, as a list of (image, data) for every entry size. """
                 ## Get parameters.
-                image = self.extract(path_image)
+                image = self.extract(path_image, label)
 
-                ## Manage resize.
-                image = self.ico_resize(image, how = self.type_resize, method = Image.ANTIALIAS)
+                if self.is_ladder():
+                        ## Manage ICC profile and conversion once (at source size), then every size.
+                        if image.info.get('icc_profile'):
+                                image = icc_to_srgb(image)
+                        images = self.ico_ladder(self.convert(image), method = Image.ANTIALIAS)
+                else:
+                        ## Manage resize.
+                        image = self.ico_resize(image, how = self.type_resize, method = Image.ANTIALIAS)
 
-                ## Manage ICC profile.
-                if 'icc_profile' in image.info:
-                        icc = mkstemp(suffix = '.icc')[1]
-                        with open(icc, 'wb') as iccfile:
-                                iccfile.write(image.info.get('icc_profile'))
-                        srgb = ImageCms.createProfile('sRGB')
-                        image = ImageCms.profileToProfile(image, icc, srgb)
+                        ## Manage ICC profile.
+                        if image.info.get('icc_profile'):
+                                image = icc_to_srgb(image)
+                        images = [self.convert(image)]
 
+                ## Manage bit depth reduction.
+                masks = [None] * len(images)
+                if self.force_to != 'original':
+                        images, masks = self.reduce(images)
+
+                loaded = []
+                for image, mask in zip(images, masks):
+                        self.parameters['bWidth'], self.parameters['bHeight'] = image.size
+                        loaded.append((image, self.pack(image), mask))
+                return loaded
+
+        def reduce(self, images):
+                """ Reduces images (sizes of a source) to `force_to` bit depth, all with same palette.
+                    Gets reduced images and their masks of fully transparent pixels.
+                """
+                reduced, masks = [], []
+                # palette of first image (if shared) or of first size.
+                palette = (self.palettes.get(self.force_to) if self.share_palette else None)
+                for image in images:
+                        image, mask, palette = reduce_depth(image, self.force_to, self.dither, palette)
+                        reduced.append(image)
+                        masks.append(mask)
+                if self.share_palette:
+                        self.palettes[self.force_to] = palette
+
+                self.mode, self.parameters['wBitCount'] = reduced[0].mode, self.force_to
+                dizio = {'new_mode'  : ('truecolor' if self.force_to == 24 else 'indexed'),
+                         'new_depth' : self.force_to}
+                self.all_icocur_written[self.path_icocur][self.index].update(dizio)
+                return reduced, masks
+
+        def convert(self, image):
+                """ Converts image to mode written. """
                 ##                                    | force_to = 'original' | force_to |
                 ##--------------------------------------------------------------------
                 ## monochrome 1bpp ("1")              | "1"
@@ -1078,38 +1906,26 @@ class Encode(object):
                 else:
                         image = image.convert(self.mode)
 
+                return image
+
+        def pack(self, image):
+                """ Packs image data (XOR mask). """
+                pad = calc_rowsize(self.parameters['wBitCount'], self.parameters['bWidth'])
                 if self.mode in ['1', 'L', 'I']:
                         if self.parameters['wBitCount'] in [1, 8]:
-                                pad = calc_rowsize(self.parameters['wBitCount'], self.parameters['bWidth'])
-                        elif self.parameters['wBitCount'] in [2, 4, 16]:
-                                pad = calc_rowsize(8, self.parameters['bWidth'])
-
-                        dataimage = image.tobytes('raw', self.mode, pad, -1)
-                        if self.parameters['wBitCount'] == 2:
-                                # tobytes() not include a raw L;2
-                                dataimage = self.convert_8bit_to_2bit(dataimage)
-                        elif self.parameters['wBitCount'] == 4:
-                                # tobytes() not include a raw L;4
-                                dataimage = self.convert_8bit_to_4bit(dataimage)
+                                dataimage = image.tobytes('raw', self.mode, pad, -1)
+                        elif self.parameters['wBitCount'] in [2, 4]:
+                                # tobytes() not include a raw L;2 / L;4
+                                dataimage = self.pack_indexed(image, self.parameters['wBitCount'], pad)
                         elif self.parameters['wBitCount'] == 16:
                                 # PIL I;16 converted to ABGR1555 format.
-                                temp = []
-                                for data in dataimage:
-                                        value = ((data & 0b10000000) << 8) | ((data & 0b11111000) << 7) | ((data & 0b11111000) << 2) | (data >> 3)
-                                        temp.append((value).to_bytes(2, byteorder = 'little'))
-                                dataimage = b"".join(temp)
+                                dataimage = self.pack_abgr1555(image, pad)
 
                 elif self.mode in ['P', 'RGB', 'RGBA']:
-                        pad = calc_rowsize(self.parameters['wBitCount'], self.parameters['bWidth'])
                         if self.parameters['wBitCount'] == 1:
                                 dataimage = image.tobytes('raw', 'P;1', pad, -1)
-                        elif self.parameters['wBitCount'] == 2:
-                                # tobytes() not include a raw P;2
-                                pad = calc_rowsize(8, self.parameters['bWidth'])
-                                dataimage = image.tobytes('raw', self.mode, pad, -1)
-                                dataimage = self.convert_8bit_to_2bit(dataimage)
-                        elif self.parameters['wBitCount'] == 4:
-                                dataimage = image.tobytes('raw', 'P;4', pad, -1)
+                        elif self.parameters['wBitCount'] in [2, 4]:
+                                dataimage = self.pack_indexed(image, self.parameters['wBitCount'], pad)
                         elif self.parameters['wBitCount'] == 8:
                                 dataimage = image.tobytes('raw', 'P', pad, -1)
                         elif self.parameters['wBitCount'] == 24:
@@ -1117,28 +1933,12 @@ class Encode(object):
                         elif self.parameters['wBitCount'] == 32:
                                 dataimage = self.get_bgra(image, pad)
 
-                return image, dataimage
-
-        def ico_palette_gpl(self, file):
-                """ Gets values from `.gpl` file. """
-                palette = []
-                with open(file, 'r') as fd:
-                        for line in fd.readlines():
-                                if not line.lower().startswith(("gimp", "name", "columns", "#")):
-                                        for pal in line.strip().split()[0:3]:
-                                                palette.append(int(pal))
-                return palette
-
-        def ico_palette_add(self, values):
-                """ Adds 4th element (b'\x00') to RGB palette entries. """
-                self.parameters['palette'] = bytes(list(chain(*[values[i : i + 3] + [0] \
-                                                                if len(values[i : i + 3]) == 3 \
-                                                                else values[i : i + 3] \
-                                                                for i in range(0, len(values), 3)])))
+                return dataimage
+
         def ico_palette(self, image):
                 """ Makes some operations on palettes. """
                 self.parameters['palette'], self.parameters['size_pal'] = b"", 0
-                adjust, is_fallback = (False for _ in range(2))
+                adjust = False
 
                 ## Assign/create palette.
                 if self.parameters['wBitCount'] <= 8:
@@ -1148,43 +1948,28 @@ class Encode(object):
                                                 try:
                                                         palvalues = self.custom_palettes[(self.mode, self.parameters['wBitCount'])]
                                                 except:
-                                                        print_err("Input error: option `custom_palettes` not proper defined.")
+                                                        raise EncodeErr(code = 3, msg = "Input error: option `custom_palettes` not proper defined.")
                                         else:
-                                                print_err("Input error: option `custom_palettes` not proper defined.")
-                                else:
-                                        is_fallback = True
-                                        fallback_palettes = {('1', 1) : self.ico_palette_gpl(join(working_path, 'palettes/11.gpl')),
-                                                             ('L', 2) : self.ico_palette_gpl(join(working_path, 'palettes/L2.gpl')),
-                                                             ('L', 4) : self.ico_palette_gpl(join(working_path, 'palettes/L4.gpl')),
-                                                             ('L', 8) : self.ico_palette_gpl(join(working_path, 'palettes/L8.gpl')),
-                                                             ('P', 1) : self.ico_palette_gpl(join(working_path, 'palettes/P1.gpl')),
-                                                             ('P', 2) : self.ico_palette_gpl(join(working_path, 'palettes/P2.gpl')),
-                                                             ('P', 4) : self.ico_palette_gpl(join(working_path, 'palettes/P4.gpl')),
-                                                             ('P', 8) : self.ico_palette_gpl(join(working_path, 'palettes/P8.gpl')),
-                                                             }
-                                        palvalues = fallback_palettes[(self.mode, self.parameters['wBitCount'])]
-
-                                if isinstance(palvalues, list):
-                                        if all(isinstance(pal, tuple) and len(pal) == 3 and all(isinstance(num, int) for num in pal) for pal in palvalues):
-                                                accpal = []
-                                                for pal in palvalues:
-                                                        accpal += pal + (0,)
-                                                self.parameters['palette'] = bytes(accpal)
-                                        elif all(isinstance(pal, int) for pal in palvalues):
-                                                if is_fallback:
-                                                        self.ico_palette_add(palvalues)
-                                                else:
+                                                raise EncodeErr(code = 3, msg = "Input error: option `custom_palettes` not proper defined.")
+
+                                        if isinstance(palvalues, list):
+                                                if all(isinstance(pal, tuple) and len(pal) == 3 and all(isinstance(num, int) for num in pal) for pal in palvalues):
+                                                        self.parameters['palette'] = pack_palette(list(chain(*palvalues)))
+                                                elif all(isinstance(pal, int) for pal in palvalues):
                                                         self.parameters['palette'] = bytes([elem for quad in [[pal] * 3 + [0] for pal in palvalues] for elem in quad])
+                                                else:
+                                                        raise EncodeErr(code = 3, msg = "Input error: option `custom_palettes` not proper defined.")
+                                        elif isinstance(palvalues, str) and isfile(palvalues) and palvalues.endswith('.gpl'):
+                                                self.parameters['palette'] = gpl_palette(abspath(palvalues), getmtime(palvalues))
                                         else:
-                                                print_err("Input error: option `custom_palettes` not proper defined.")
-                                elif isfile(palvalues) and palvalues.endswith('.gpl'):
-                                        palvalues = palette_gpl(palvalues)
-                                        self.ico_palette_add(palvalues)
+                                                raise EncodeErr(code = 3, msg = "Input error: option `custom_palettes` not proper defined.")
                                 else:
-                                        print_err("Input error: option `custom_palettes` not proper defined.")
+                                        self.parameters['palette'] = fallback_palette(self.mode, self.parameters['wBitCount'])
                         else:
                                 adjust = True
-                                self.parameters['palette'] = image.palette.palette
+                                # RGB entries in use (as PNG PLTE chunk).
+                                colors = min(self.palette_colors(image), 1 << self.parameters['wBitCount'])
+                                self.parameters['palette'] = bytes(image.getpalette()[: colors * 3]).ljust(colors * 3, b'\x00')
 
                 ## Define length of the palette.
                 self.parameters['size_pal'] = len(self.parameters['palette'])
@@ -1258,10 +2043,38 @@ class Encode(object):
                                                                                                              self.parameters['bHeight'])})
                 return image
 
+        def is_ladder(self):
+                """ Determines whether every source is written at several sizes. """
+                return self.type_resize == 'ladder' or isinstance(self.type_resize, list)
+
+        def ico_ladder(self, image, method = Image.ANTIALIAS):
+                """ Resizes to several `.ico` dimensions, every size from the previous (larger) one. """
+                old_w, old_h = image.size
+                if self.type_resize == 'ladder':
+                        # standard sizes, no enlargement.
+                        sizes = [side for side in [256, 128, 64, 48, 32, 24, 16] if side <= max(old_w, old_h)] or [max(old_w, old_h)]
+                else:
+                        sizes = sorted(self.type_resize, key = lambda size : (max(size) if isinstance(size, tuple) else size), reverse = True)
+
+                images = []
+                for size in sizes:
+                        if isinstance(size, tuple):
+                                new_w, new_h = size
+                        else:
+                                # keep aspect ratio into (size x size).
+                                scale = size / max(old_w, old_h)
+                                new_w, new_h = max(1, round(old_w * scale)), max(1, round(old_h * scale))
+                        if (new_w, new_h) != image.size:
+                                image = image.resize((new_w, new_h), method)
+                        images.append(image)
+
+                self.all_icocur_written[self.path_icocur][self.index].update({'size' : '%s x %s' %(old_w, old_h),
+                                                                              'resize' : ', '.join('%s x %s' %im.size for im in images)})
+                return images
+
         def header_icondir(self):
                 """ Defines the ICONDIR header. """
                 ## (2bytes)idReserved (always 0) - (2bytes)idType (ico=1, cur=2) - (2bytes)idCount.
-                self.parameters['bReserved'] = 0
                 return pack('3H', self.parameters['bReserved'], self.parameters['idType'], self.parameters['idCount'])
 
         def header_bmpinfo(self):
@@ -1291,55 +2104,101 @@ class Encode(object):
                 return pack('3I2H2I2i2I', biSize, biWidth, biHeight, biPlanes, biBitCount, biCompression, biSizeImage,
                                           biXPelsPerMeter, biYPelsPerMeter, biClrUsed, biClrImportant)
 
-        def to_icocur(self, path_image, hotspot):
-                """ Creates result of conversion. """
-                image, xordata = self.load(path_image)
+        def is_png_entry(self, mask = None, transparency = None):
+                """ Determines whether current entry is stored PNG compressed. """
+                if self.png_entries is None or self.parameters['wBitCount'] == 16:
+                        return False
+                if mask is not None and transparency is None:
+                        # PNG can't keep transparent pixels as AND mask does (no alpha or no palette entry only for them).
+                        return False
+                return self.png_entries == 'all' or self.parameters['bWidth'] >= 256 or self.parameters['bHeight'] >= 256
+
+        def png_entry(self, xordata, transparency = None):
+                """ Packs entry image data (XOR mask rows, bottom-up) to PNG (`transparency` is index of transparent pixels). """
+                bits = self.parameters['wBitCount']
+                size = (self.parameters['bWidth'], self.parameters['bHeight'])
+                pad = calc_rowsize(bits, self.parameters['bWidth'])
+                if bits <= 8:
+                        image = Image.frombuffer('P', size, xordata, 'raw', ('P' if bits == 8 else 'P;%s' %bits), pad, -1)
+                        # palette from RGBQUAD (B, G, R, 0).
+                        palette = self.parameters['palette']
+                        image.putpalette(bytes(chain(*zip(palette[2::4], palette[1::4], palette[0::4]))))
+                        if transparency is not None:
+                                return to_png(image, self.png_level, bits = bits, transparency = transparency)
+                        return to_png(image, self.png_level, bits = bits)
+                elif bits == 24:
+                        image = Image.frombuffer('RGB', size, xordata, 'raw', 'BGR', pad, -1)
+                else:
+                        image = Image.frombuffer('RGBA', size, xordata, 'raw', 'BGRA', pad, -1)
+                return to_png(image, self.png_level)
+
+        def to_icocur(self, path_image, label, hotspot):
+                """ Creates result of conversion, a list of (ICONDIRENTRY fields without offset, image data chunks) for every entry size. """
+                loaded = self.load(path_image, label)
                 if hotspot != "":
                         self.all_icocur_written[self.path_icocur][self.index].update({'hotspot_x' : hotspot[0],
                                                                                       'hotspot_y' : hotspot[1]})
                 self.parameters['wPlanes'] = 0
 
-                ## Identify palette.
-                self.ico_palette(image)
-
-                ## Keep offset.
-                dataoffset = self.parameters['dwImageOffset']
-
-                ## Generate BITMAPINFO header.
-                icobytes = self.header_bmpinfo()
+                ## Identify palette (same for every size).
+                self.ico_palette(loaded[0][0])
 
-                # Write palette.
-                if self.parameters['palette']:
-                        icobytes += self.parameters['palette']
-
-                ## Write XOR mask.
-                icobytes += xordata
+                entries = []
+                for image, xordata, mask in loaded:
+                        self.parameters['bWidth'], self.parameters['bHeight'] = image.size
 
-                ## Write AND mask.
-                if self.mode == 'RGBA':
-                        icobytes += Mask().compute_AND_mask(self.parameters['bWidth'], self.parameters['bHeight'], xordata)
-                else:
-                        icobytes += pack('B', 0) * self.parameters['size_and']
-
-                ## Increment offset.
-                self.parameters['dwImageOffset'] += len(icobytes)
-                ## Calculate size of (icondirentry + image data).
-                self.parameters['dwBytesInRes'] = len(icobytes)
-                ## Define correct dimension, 0 means 256 (or more).
-                if self.parameters['bWidth'] >= 256: self.parameters['bWidth'] = 0
-                if self.parameters['bHeight'] >= 256: self.parameters['bHeight'] = 0
-
-                ## Pack icondirentry header.
-                icondirentry = pack('4B2H2I', self.parameters['bWidth'], self.parameters['bHeight'], self.parameters['bColorCount'],
-                                              self.parameters['bReserved'],
-                                             (self.parameters['wPlanes'] if hotspot == "" else hotspot[0]),
-                                             (self.parameters['wBitCount'] if hotspot == "" else hotspot[1]),
-                                              self.parameters['dwBytesInRes'], dataoffset)
-
-                return icondirentry, icobytes
-
-        def printsave(self, how, header, data, hotspot):
-                """ Saves conversion file and print results. """
+                        if self.is_png_entry(mask, image.info.get('transparency')):
+                                icochunks = [self.png_entry(xordata, image.info.get('transparency'))]
+                                # PNG palette is always full (cursors have no color count).
+                                colorcount = ((1 << self.parameters['wBitCount']) % 256 if hotspot == "" else 0)
+                        else:
+                                ## Generate BITMAPINFO header.
+                                bmpinfo = self.header_bmpinfo()
+
+                                ## Compute AND mask.
+                                if self.mode == 'RGBA':
+                                        anddata = Mask().compute_AND_mask(self.parameters['bWidth'], self.parameters['bHeight'], xordata)
+                                elif mask is not None:
+                                        anddata = Mask().transparent_AND_mask(mask)
+                                else:
+                                        anddata = bytes(self.parameters['size_and'])
+
+                                ## Image data: BITMAPINFO header, palette, XOR mask, AND mask (written as they are).
+                                icochunks = [bmpinfo, self.parameters['palette'], xordata, anddata]
+                                colorcount = self.parameters['bColorCount']
+
+                        ## Calculate size of (icondirentry + image data).
+                        self.parameters['dwBytesInRes'] = sum(len(chunk) for chunk in icochunks)
+                        ## Define correct dimension, 0 means 256 (or more).
+                        if self.parameters['bWidth'] >= 256: self.parameters['bWidth'] = 0
+                        if self.parameters['bHeight'] >= 256: self.parameters['bHeight'] = 0
+
+                        ## Icondirentry fields (offset is added when all sizes are known).
+                        icondirentry = (self.parameters['bWidth'], self.parameters['bHeight'], colorcount, self.parameters['bReserved'],
+                                        (self.parameters['wPlanes'] if hotspot == "" else hotspot[0]),
+                                        (self.parameters['wBitCount'] if hotspot == "" else hotspot[1]),
+                                        self.parameters['dwBytesInRes'])
+                        entries.append((icondirentry, icochunks))
+
+                return entries
+
+        def pack_icondir(self, entries):
+                """ Packs ICONDIR header and ICONDIRENTRYs (offsets from entries sizes), gets header and image data chunks. """
+                self.parameters['idCount'] = len(entries)
+                ## Size of all the headers (image headers + file header)
+                ## (1byte)bWidth - (1byte)bHeight - (1byte)bColorCount - (1byte)bReserved -
+                ## -(2bytes)wPlanes - (2bytes)wBitCount - (4bytes)dwBytesInRes - (4bytes)dwImageOffset.
+                dwImageOffset = calcsize('4B2H2I') * self.parameters['idCount'] + calcsize('HHH')
+
+                header, chunks = [self.header_icondir()], []
+                for icondirentry, icochunks in entries:
+                        header.append(pack('4B2H2I', *icondirentry, dwImageOffset))
+                        chunks.extend(icochunks)
+                        dwImageOffset += icondirentry[-1]
+                return header, chunks
+
+        def printsave(self, how, header, chunks, hotspot):
+                """ Saves conversion file (header chunks, then image data chunks) and print results. """
 
                 def printresult(indx):
                         result = self.all_icocur_written[self.path_icocur][indx]
@@ -1368,65 +2227,426 @@ class Encode(object):
                         printresult(0)
                         self.print_std('saved = %s' %self.path_icocur)
                 elif how == 'multi':
-                        for indx in range(self.parameters['idCount']):
+                        for indx in range(len(self.all_icocur_written[self.path_icocur])):
                                 printresult(indx)
                         self.print_std('\nsaved = %s' %self.path_icocur)
                 # save.
-                with open(self.path_icocur, 'wb') as f_ico:
-                        f_ico.write(header)
-                        f_ico.write(data)
+                if self.sink is not None:
+                        self.sink.writelines(header)
+                        self.sink.writelines(chunks)
+                else:
+                        with open(self.path_icocur, 'wb') as f_ico:
+                                f_ico.writelines(header)
+                                f_ico.writelines(chunks)
+
+        def encode_options(self):
+                """ Gets options of a conversion job (as `build_icocur` arguments). """
+                return {'type_resize'     : self.type_resize,
+                        'force_to'        : self.force_to,
+                        'custom_palettes' : self.custom_palettes,
+                        'png_entries'     : self.png_entries,
+                        'png_level'       : self.png_level,
+                        'dither'          : self.dither}
 
         def work(self, paths, name, frmt, hotspot):
                 """ Executes conversion job."""
-                self.parameters = {}
-
-                if frmt == '.ico':
-                        self.parameters['idType'] = 1
-                elif frmt == '.cur':
-                        self.parameters['idType'] = 2
+                # in-memory images are named by position.
+                labels = [(path_image if isinstance(path_image, str) else "stream_%s" %indx) for indx, path_image in enumerate(paths)]
 
                 if name == "":
+                        ## Create `.ico` / `.cur` (single) for every image.
                         how = 'single'
-                        path_temp = self.path_icocur
+                        jobs = [([path_image], [label], join(self.path_icocur, splitext(basename(label))[0] + frmt))
+                                for path_image, label in zip(paths, labels)]
                 else:
+                        ## Create `.ico` / `.cur` (multi).
                         how = 'multi'
-                        ## Define header of `.ico` file.
-                        self.parameters['idCount'] = len(paths)
-                        icocur_header, icocur_data = self.header_icondir(), b""
-                        ## Size of all the headers (image headers + file header)
-                        ## (1byte)bWidth - (1byte)bHeight - (1byte)bColorCount - (1byte)bReserved -
-                        ## -(2bytes)wPlanes - (2bytes)wBitCount - (4bytes)dwBytesInRes - (4bytes)dwImageOffset.
-                        self.parameters['dwImageOffset'] = calcsize('4B2H2I') * self.parameters['idCount'] + calcsize('HHH')
-
-                ## Create `.ico` / `.cur`.
-                for self.index, path_image in enumerate(paths):
-                        try:
-                                if how == 'single':
-                                        self.index = 0
-                                        self.parameters['idCount'] = 1
-                                        icocur_header, icocur_data = self.header_icondir(), b""
-                                        self.parameters['dwImageOffset'] = calcsize('4B2H2I') * self.parameters['idCount'] + calcsize('HHH')
-                                        self.path_icocur = join(path_temp, splitext(basename(path_image))[0] + frmt)
-
-                                icondirentry, icobytes = self.to_icocur(path_image, hotspot)
-                                icocur_header += icondirentry
-                                icocur_data += icobytes
-
-                                if how == 'single':
-                                        ## Save `.ico` / `.cur` (single).
-                                        self.printsave(how, icocur_header, icocur_data, hotspot)
-                                elif how == 'multi':
-                                        ## Save `.ico` / `.cur` (multi).
-                                        if self.index == self.parameters['idCount'] - 1:
-                                                self.printsave(how, icocur_header, icocur_data, hotspot)
-
-                        except EncodeErr as e:
-                                self.all_icocur_written.update({self.path_icocur : e.msg})
-                                self.print_err(e.msg, toexit = (False if how == 'single' else True))
-                                if how == 'single':
+                        jobs = [(paths, labels, self.path_icocur)]
+
+                for images, names, self.path_icocur in jobs:
+                        result = build_icocur(images, frmt, (hotspot or None), labels = names, chunked = True,
+                                              palettes = (self.palettes if self.share_palette else None), **self.encode_options())
+                        if 'error' in result:
+                                self.all_icocur_written.update({self.path_icocur : result['error']})
+                                self.print_err(result['error'], toexit = (False if how == 'single' else True))
+                        else:
+                                self.all_icocur_written.update({self.path_icocur : result['info']})
+                                ## Save `.ico` / `.cur`.
+                                self.printsave(how, result['header'], result['chunks'], hotspot)
+
+        def work_parallel(self, tasks):
+                """ Executes conversion job for every group in a process pool,
+                    results are shown / saved serially in input order.
+                """
+                options = self.encode_options()
+
+                with ProcessPoolExecutor(max_workers = self.workers) as executor:
+                        jobs = [(None if message else executor.submit(encode_job, (paths, path_icocur, name, frmt, hotspot, options)))
+                                for path_icocur, paths, name, frmt, hotspot, message in tasks]
+
+                        for (self.path_icocur, paths, name, frmt, hotspot, message), job in zip(tasks, jobs):
+                                self.print_std('#' * 80)
+                                if message:
+                                        self.add_errors(message)
                                         continue
-                                elif how == 'multi':
-                                        return
+
+                                how = ('single' if name == "" else 'multi')
+                                written, outputs = job.result()
+                                for self.path_icocur, result in written.items():
+                                        self.all_icocur_written.update({self.path_icocur : result})
+                                        if isinstance(result, str):
+                                                self.print_err(result, toexit = (False if how == 'single' else True))
+                                        else:
+                                                # already encoded by a worker.
+                                                self.printsave(how, *outputs[self.path_icocur], hotspot)
+
+def encode_images(images, fmt = '.ico', hotspot = None, type_resize = 'up256_prop', force_to = 'original',
+                  custom_palettes = None, sink = None, png_entries = None, png_level = 9, dither = None):
+        """ Encodes a list of images (PIL images and/or image file bytes) into a single `.ico` / `.cur`, without touching disk.
+            `hotspot` is a tuple (x, y) for `.cur` (default (0, 0)); other options as `Encode`.
+            Returns `.ico` / `.cur` bytes or, if `sink` (a file-like) is defined, writes them to it.
+            Raises `EncodeErr` if conversion fails.
+        """
+        if sink is not None and not hasattr(sink, 'writelines'):
+                raise EncodeErr(code = 1, msg = "Input error: option `sink` not a file-like object.")
+
+        result = build_icocur(images, fmt, hotspot, type_resize = type_resize, force_to = force_to, custom_palettes = custom_palettes,
+                              png_entries = png_entries, png_level = png_level, dither = dither, chunked = (sink is not None))
+        if 'error' in result:
+                raise EncodeErr(code = 1, msg = result['error'])
+        if sink is None:
+                return result['data']
+        sink.writelines(result['header'])
+        sink.writelines(result['chunks'])
+
+class EncodeGroup(Encode):
+
+        def __init__(self, paths, path_icocur, name, frmt, hotspot, options):
+
+                """
+                    Encodes a group of images (already checked) to `path_icocur` (a folder if `name` is "", else a file path),
+                    with `options` of `Encode`. Results aren't shown; `.ico` / `.cur` data are kept in `outputs`.
+                """
+
+                self.paths_images = [paths]
+                self.type_resize = options['type_resize']
+                self.force_to = options['force_to']
+                self.custom_palettes = options['custom_palettes']
+                self.png_entries = options['png_entries']
+                self.png_level = options['png_level']
+                self.dither = options['dither']
+                self.share_palette = False
+                self.palettes = {}
+                self.sink = None
+                self.workers = 1
+                self.is_cli = False
+                self.print_std = partial(print_std, view = False)
+                self.print_err = partial(print_err, view = False)
+                self.all_icocur_written = {}
+                self.outputs = {}
+                self.path_icocur = path_icocur
+                self.work(paths, name, frmt, hotspot)
+
+        def printsave(self, how, header, chunks, hotspot):
+                """ Keeps conversion file data (header chunks, image data chunks). """
+                self.outputs.update({self.path_icocur : (header, chunks)})
+
+def encode_job(job):
+        """ Encodes a group of images in a worker process; gets its results and `.ico` / `.cur` data chunks by output path. """
+        encoder = EncodeGroup(*job)
+        return encoder.all_icocur_written, encoder.outputs
+
+## _______________________
+##| Codec `.ico` / `.cur` |---------------------------------------------------------------------------------------------------------------------------------
+##|_______________________|
+##
+
+class Parser(Decode):
+
+        def __init__(self, data, name, options):
+
+                """
+                    Parses a `.ico` / `.cur` (`data`, bytes-like) named `name`, with `options` of `Decode` (and 'header_only').
+                    Every state of the job is kept by instance, nothing is shown or saved.
+                """
+
+                self.data_icocur = memoryview(data)
+                self.path_icocur = name
+                self.rebuild = options['rebuild']
+                self.select = options['select']
+                self.raw = options['raw']
+                self.force_to = options['force_to']
+                self.dither = options['dither']
+                self.header_only = options['header_only']
+                self.is_cli = False
+                self.parameters = {}
+
+        def parse(self):
+                """ Gets entries or error message. """
+                try:
+                        return self.from_icocur()
+                finally:
+                        ## Drop every view.
+                        self.parameters = {}
+                        try:
+                                self.data_icocur.release()
+                        except BufferError:
+                                # still exported by an image, left to garbage collector.
+                                pass
+
+def parse_icocur(data, name = "", rebuild = False, select = None, raw = False, force_to = 'original', dither = None, header_only = False):
+        """ Parses `.ico` / `.cur` bytes (or bytes-like, as a mapped file), reentrant: can run in threads.
+            `name` is used only to check extension; `header_only` as `Inspect`; other options as `Decode`.
+            Gets entries, as `all_icocur_readed` values ('image_<n>' : dict or error message, 'warning' : list),
+            or {'error' : message}; never prints nor exits.
+        """
+        msg = check_decode_options(rebuild, raw, force_to, dither, select)
+        if msg:
+                return {'error' : msg}
+        if not isinstance(data, (bytes, bytearray, memoryview, mmap)):
+                return {'error' : "Input error: neither bytes nor bytes-like."}
+        if not isinstance(name, str):
+                return {'error' : "Input error: name not a string."}
+
+        result = Parser(data, name, {'rebuild'     : rebuild,
+                                     'select'      : select,
+                                     'raw'         : raw,
+                                     'force_to'    : force_to,
+                                     'dither'      : dither,
+                                     'header_only' : header_only}).parse()
+        return ({'error' : result} if isinstance(result, str) else result)
+
+class Builder(Encode):
+
+        def __init__(self, images, labels, frmt, hotspot, options, palettes = None):
+
+                """
+                    Builds a `.ico` / `.cur` (`frmt`, with `hotspot`, "" for `.ico`) from `images` named `labels`,
+                    with `options` of `Encode`; `palettes` (a dict) is shared palette, if any.
+                    Every state of the job is kept by instance, nothing is shown or saved.
+                """
+
+                self.images = images
+                self.labels = labels
+                self.frmt = frmt
+                self.hotspot = hotspot
+                self.type_resize = options['type_resize']
+                self.force_to = options['force_to']
+                self.custom_palettes = ({} if options['custom_palettes'] is None else options['custom_palettes'])
+                self.png_entries = options['png_entries']
+                self.png_level = options['png_level']
+                self.dither = options['dither']
+                self.share_palette = palettes is not None
+                self.palettes = ({} if palettes is None else palettes)
+                self.sink = None
+                self.is_cli = False
+                self.all_icocur_written = {}
+                self.path_icocur = ""
+
+        def make(self):
+                """ Gets `.ico` / `.cur` header and image data chunks (two lists) or error message. """
+                self.parameters = {'bReserved' : 0,
+                                   'idType'    : (1 if self.frmt == '.ico' else 2)}
+                entries = []
+                try:
+                        for self.index, (path_image, label) in enumerate(zip(self.images, self.labels)):
+                                entries.extend(self.to_icocur(path_image, label, self.hotspot))
+                except EncodeErr as e:
+                        return e.msg
+
+                return self.pack_icondir(entries)
+
+def build_icocur(images, frmt = '.ico', hotspot = None, type_resize = 'up256_prop', force_to = 'original', custom_palettes = None,
+                 png_entries = None, png_level = 9, dither = None, labels = None, palettes = None, chunked = False):
+        """ Builds a `.ico` / `.cur` from a list of images (paths, PIL images and/or image file bytes), reentrant: can run in threads.
+            `hotspot` is a tuple (x, y) for `.cur` (default (0, 0)); `labels` names images in results (default path or 'stream_<n>');
+            `palettes` (a dict) keeps palette shared between calls, as `share_palette`; other options as `Encode`.
+            Gets {'data' : bytes, 'info' : a list, as `all_icocur_written` values} or {'error' : message}; never prints nor exits.
+            If `chunked`, 'data' is replaced by 'header' and 'chunks', lists of bytes to write in turn (nothing joined in memory).
+        """
+        msg = check_encode_options(type_resize, force_to, dither, False, png_entries, png_level)
+        if msg:
+                return {'error' : msg}
+        if not isinstance(images, list):
+                return {'error' : "Input error: images not a list."}
+        if not images:
+                return {'error' : "Input error: image file/directory path/s missing."}
+
+        if frmt == '.cur':
+                hotspot = ((0, 0) if hotspot is None else tuple(hotspot))
+                if len(hotspot) != 2 or not all(isinstance(hot, int) for hot in hotspot):
+                        return {'error' : "Input error: hotspot specification not proper defined."}
+                if len(images) > 1 or type_resize == 'ladder' or isinstance(type_resize, list):
+                        return {'error' : "Input error: can't create multi-size '.cur'."}
+        elif frmt == '.ico':
+                if hotspot is not None:
+                        return {'error' : "Input error: hotspot specification invalid for `.ico` conversion."}
+                hotspot = ""
+        else:
+                return {'error' : "Input error: icon / cursor format '%s' not recognized." %frmt}
+
+        if labels is None:
+                labels = [(image if isinstance(image, str) else "stream_%s" %indx) for indx, image in enumerate(images)]
+        builder = Builder(images, labels, frmt, hotspot, {'type_resize'     : type_resize,
+                                                          'force_to'        : force_to,
+                                                          'custom_palettes' : custom_palettes,
+                                                          'png_entries'     : png_entries,
+                                                          'png_level'       : png_level,
+                                                          'dither'          : dither}, palettes)
+        result = builder.make()
+        if isinstance(result, str):
+                return {'error' : result}
+        info = builder.all_icocur_written[builder.path_icocur]
+        header, chunks = result
+        if chunked:
+                return {'header' : header, 'chunks' : chunks, 'info' : info}
+        return {'data' : b"".join(chain(header, chunks)), 'info' : info}
+
+## _________________________
+##| Optimize `.ico` / `.cur` |------------------------------------------------------------------------------------------------------------------------------
+##|_________________________|
+##
+
+class Optimize(Decode):
+
+        def __init__(self, paths_icocurs, png_entries = 'large', png_level = 9):
+
+                """
+                    `paths_icocurs`   : a list   : can contain one/more icon/cursor(s) path(s)
+                                                   and/or one/more folder icon/cursor(s) path(s) to rewrite in place.
+                    `png_entries`     : a string : if 'large', bitmap entries of 256 pixels are recompressed to PNG;
+                                                   if 'all', every bitmap entry is (only when PNG is smaller).
+                    `png_level`       : an int   : compression level (0-9) of PNG entries.
+                                                   Byte-identical duplicate entries are dropped; a file is rewritten
+                                                   only if it gets smaller. Results (sizes, bytes saved) are in `all_icocur_readed`.
+                """
+
+                self.paths_icocurs = paths_icocurs
+                self.paths_image, self.names_image, self.formats_image = ([] for _ in range(3))
+                self.rebuild = False
+                self.force_to = 'original'
+                self.dither = None
+                self.select = None
+                self.raw = False
+                self.workers = 1
+                self.png_entries = png_entries
+                self.png_level = png_level
+                self.is_cli = is_cli
+                self.want_save = False
+                self.header_only = False
+                self.build()
+
+                ## Total report.
+                results = [result for result in self.all_icocur_readed.values() if isinstance(result, dict)]
+                self.print_std('\n' + '#' * 80 + '\n')
+                self.print_std('optimized = %s / %s, bytes saved = %s' %(sum(1 for result in results if result['saved'] > 0),
+                                                                         len(results),
+                                                                         sum(result['saved'] for result in results)))
+
+        def check_output(self):
+                """ Verifies options (files are rewritten in place). """
+                if self.png_entries not in ['large', 'all']:
+                        print_err("Input error: option 'png_entries' unknown '%s' value." %self.png_entries)
+                if not isinstance(self.png_level, int) or not 0 <= self.png_level <= 9:
+                        print_err("Input error: option 'png_level' not an integer in 0-9.")
+
+        def repack(self, image):
+                """ Encodes a decoded bitmap entry to PNG (without alpha, if fully opaque). """
+                if image.mode == 'RGBA' and image.getchannel('A').getextrema() == (255, 255):
+                        image = image.convert('RGB')
+                return to_png(image, self.png_level)
+
+        def optimize(self, data, ico_r):
+                """ Gets optimized `.ico` / `.cur` chunks and counters. """
+                identf, count = unpack_from('<2H', data, 2)
+                entries, chunks, seen = ([] for _ in range(3))
+                repacked, dropped = 0, 0
+
+                for cnt in range(count):
+                        bWidth, bHeight, bColorCount, bReserved, \
+                                wPlanes_or_wXHotSpot, wBitCount_or_wYHotSpot, dWBytesInRes, dWImageOffset = unpack_from('<4B2H2L', data, 6 + 16 * cnt)
+                        entrydata = data[dWImageOffset : dWImageOffset + dWBytesInRes]
+                        subresult = ico_r.get('image_%s' %cnt)
+
+                        ## Recompress bitmap (only if decoded and gets smaller).
+                        if not self.is_png(entrydata) and isinstance(subresult, dict) and 'im_obj' in subresult and \
+                           (self.png_entries == 'all' or (bWidth or 256) >= 256 or (bHeight or 256) >= 256):
+                                pngdata = self.repack(subresult['im_obj'])
+                                if len(pngdata) < len(entrydata):
+                                        entrydata, bColorCount = pngdata, 0
+                                        if identf == 1:
+                                                # from IHDR color type.
+                                                wBitCount_or_wYHotSpot = (32 if pngdata[25] == 6 else 24)
+                                        repacked += 1
+
+                        ## Drop duplicates.
+                        key = (bWidth, bHeight, bColorCount, bReserved, wPlanes_or_wXHotSpot, wBitCount_or_wYHotSpot, bytes(entrydata))
+                        if key in seen:
+                                dropped += 1
+                                continue
+                        seen.append(key)
+                        entries.append([bWidth, bHeight, bColorCount, bReserved, wPlanes_or_wXHotSpot, wBitCount_or_wYHotSpot, len(entrydata)])
+                        chunks.append(entrydata)
+
+                ## Offsets from entries sizes.
+                offset = calcsize('HHH') + calcsize('4B2H2I') * len(entries)
+                header = [pack('3H', 0, identf, len(entries))]
+                for entry in entries:
+                        header.append(pack('4B2H2I', *entry, offset))
+                        offset += entry[-1]
+
+                return header + chunks, repacked, dropped
+
+        def work(self, is_byte = False):
+                """ Executes optimization job. """
+                if is_byte:
+                        self.all_icocur_readed.update({self.path_icocur : "Input error: bytes can't be optimized in place."})
+                        self.printsave()
+                        return
+                if not self.path_icocur.lower().endswith(('.ico', '.cur')):
+                        self.all_icocur_readed.update({self.path_icocur : "Input error: not an `.ico` / `.cur` file."})
+                        self.printsave()
+                        return
+
+                with open(self.path_icocur, 'rb') as file:
+                        data = file.read()
+                self.data_icocur = memoryview(data)
+                ico_r = self.read(is_byte = True)
+
+                if ico_r:
+                        chunks, repacked, dropped = self.optimize(data, ico_r)
+                        size = sum(len(chunk) for chunk in chunks)
+                        if size < len(data):
+                                ## Write beside, then replace.
+                                fd, temp = mkstemp(suffix = '.tmp', dir = dirname(abspath(self.path_icocur)))
+                                try:
+                                        with fdopen(fd, 'wb') as file:
+                                                file.writelines(chunks)
+                                        copymode(self.path_icocur, temp)
+                                        replace(temp, self.path_icocur)
+                                except:
+                                        remove(temp)
+                                        raise
+                        else:
+                                size, repacked, dropped = len(data), 0, 0
+                        self.all_icocur_readed.update({self.path_icocur : {'size_before' : len(data),
+                                                                           'size_after'  : size,
+                                                                           'saved'       : len(data) - size,
+                                                                           'repacked'    : repacked,
+                                                                           'dropped'     : dropped}})
+                self.printsave()
+
+        def printsave(self):
+                """ Prints results. """
+                result = self.all_icocur_readed.get(self.path_icocur)
+                if isinstance(result, dict):
+                        self.print_std('\nfile = %s' %self.path_icocur)
+                        self.print_std('{:<30} {:>10} {:>10}'.format('size = %s --> %s' %(result['size_before'], result['size_after']),
+                                                                     'repacked = %s' %result['repacked'],
+                                                                     'dropped = %s' %result['dropped']))
+                        self.print_std('saved = %s bytes' %result['saved'])
+                elif result is not None:
+                        self.print_err('\nfile = %s\n%s' %(self.path_icocur, result), toexit = False)
 
 if __name__ == "__main__":
         is_cli = True
@@ -1436,7 +2656,17 @@ if __name__ == "__main__":
                        paths_image = opts['paths_image'],
                        names_image = opts['names_image'],
                        formats_image = opts['formats_image'],
-                       rebuild = opts['rebuild'])
+                       rebuild = opts['rebuild'],
+                       force_to = opts['force_to'],
+                       select = opts['select'],
+                       workers = opts['workers'],
+                       dither = opts['dither'])
+                if opts['stats']:
+                        # with workers, caches are in their own processes.
+                        info = convert_palette.cache_info()
+                        print('\npalette cache: hits = %s, misses = %s, size = %s / %s' %(info.hits, info.misses, info.currsize, info.maxsize))
+        elif opts['mode'] == 'inspect':
+                Inspect(opts['paths_icocurs'])
         elif opts['mode'] == 'encode':
                 Encode(opts['paths_images'],
                        paths_icocur = opts['paths_icocur'],
@@ -1444,6 +2674,15 @@ if __name__ == "__main__":
                        formats_icocur = opts['formats_icocur'],
                        type_resize = opts['type_resize'],
                        force_to = opts['force_to'],
-                       custom_palettes = opts['custom_palettes'])
+                       custom_palettes = opts['custom_palettes'],
+                       png_entries = opts['png_entries'],
+                       png_level = opts['png_level'],
+                       workers = opts['workers'],
+                       dither = opts['dither'],
+                       share_palette = opts['share_palette'])
+        elif opts['mode'] == 'optimize':
+                Optimize(opts['paths_icocurs'],
+                         png_entries = opts['png_entries'],
+                         png_level = opts['png_level'])
         elif opts['mode'] is None:
                 is_cli = False
@@ -3,24 +3,30 @@
 
 import Iconolatry
 import os
+import sys
 import re
 import logging
+from logging.handlers import BufferingHandler
 import argparse
-from time import perf_counter
+from time import perf_counter, time, localtime, gmtime, strftime
 from zlib import decompress
-from struct import unpack_from, calcsize
-from PIL import Image
+from struct import unpack_from, calcsize, pack
+from PIL import Image, ImageChops
 from stat import S_IWRITE
-from shutil import rmtree
+from shutil import rmtree, which
 from math import ceil
 from subprocess import Popen, PIPE
-from zipfile import ZipFile
-from io import BytesIO
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED
+from tarfile import TarFile, TarInfo, DIRTYPE, SYMTYPE
+from gzip import GzipFile
+from locale import getpreferredencoding
+from io import BytesIO, StringIO
 from itertools import chain
-from shutil import make_archive
-from tempfile import gettempdir
+from tempfile import gettempdir, mkdtemp, TemporaryDirectory
 from hashlib import md5
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
 
 __version__     = "V (Reborn)"
 __license__     = "GPL-3.0 License"
@@ -231,23 +237,48 @@ def metamorphosis_parser():
         morph_optional.add_argument('-p', '--pack', action = 'store_true', default = False,
                                     dest = "pack",
                                     help = "Enable packing converted cursors. Disabled by default")
+        morph_optional.add_argument('-l', '--level', action = 'store', default = 6, choices = range(10), type = int,
+                                    dest = "level", metavar = "{0-9}",
+                                    help = "Select compression level of packed archive. Default is `6`.")
+        morph_optional.add_argument('-e', '--reproducible', action = 'store_true', default = False,
+                                    dest = "reproducible",
+                                    help = "Enable reproducible packed archive (sorted members, fixed times and owners). Disabled by default.")
+        morph_optional.add_argument('-m', '--ram', action = 'store_true', default = False,
+                                    dest = "ram",
+                                    help = "Enable temporary workspace in RAM (`/dev/shm`), if available. Disabled by default.")
+        morph_optional.add_argument('-d', '--discard', action = 'store_true', default = False,
+                                    dest = "discard",
+                                    help = "Enable deleting temporary files of every input once converted (less disk / RAM used). \
+Disabled by default, all are deleted at the end.")
+        morph_optional.add_argument('-j', '--jobs', action = 'store', default = 1, type = int,
+                                    dest = "jobs",
+                                    help = "Number of processes converting independent themes in parallel. Default is `1`.")
         morph_optional.add_argument('-r', '--crop', action = 'store_false', default = True,
                                     dest = "crop",
                                     help = "Disable removing transparent border. Enabled by default.")
-        morph_optional.add_argument('-s', '--size', action = 'store', default = 16, choices = [16, 24, 32, 48, 64, 96], type = int,
+        morph_optional.add_argument('-s', '--size', nargs = "+", action = 'extend', default = [], choices = [16, 24, 32, 48, 64, 96], type = int,
                                     dest = "size",
-                                    help = "Select size (in pixels) for converted cursors. Default is `16` pixels.")
+                                    help = "Select size(s) (in pixels) for converted cursors: every `X11` cursor holds all sizes, \
+`.ani` uses the first. Default is `16` pixels.")
         morph_optional.add_argument('-c', '--color', action = 'store', default = 'rgb', choices = ['rgb', 'rbg', 'grb', 'brg', 'gbr', 'bgr'], type = str,
                                     dest = "color",
                                     help = "Select color change for converted cursors. Default is `rgb`.")
         morph_optional.add_argument('-t', '--platform', action = 'store', default = 'Linux', choices = ['Linux', 'Windows'], type = str,
                                     dest = "platform",
                                     help = "Select destination OS for converted cursors. Default is `Linux` platform.")
+        morph_optional.add_argument('-b', '--backend', action = 'store', default = 'native', choices = ['native', 'xcursorgen'], type = str,
+                                    dest = "backend",
+                                    help = "Select writer of `X11` cursors (`xcursorgen` must be installed). Default is `native`.")
 
         try:
                 options.update(vars(morph_parser.parse_args()))
-                ## Define size as tuple (width and height).
-                options['size'] = (options['size'], options['size'])
+                ## Define sizes as tuples (width and height), first is main size.
+                options['sizes'] = [(size, size) for size in OrderedDict.fromkeys(options['size'] or [16])]
+                if options['platform'] == 'Windows':
+                        options['sizes'] = options['sizes'][: 1]
+                options['size'] = options['sizes'][0]
+                if options['jobs'] < 1:
+                        morph_parser.error("argument -j/--jobs: not a positive integer.")
         except Exception as e:
                 raise e
 
@@ -260,16 +291,17 @@ def metamorphosis_parser():
 ##
 
 class Editor(object):
-        def __init__(self, parameters, options):
+        def __init__(self, parameters, process):
                 self.parameters = parameters
-                self.options = options
+                self.process = process
+                self.options = process.options
 
-        def resize_meth(self, image, method = Image.ANTIALIAS):
+        def resize_meth(self, image, size, method = Image.ANTIALIAS):
                 """ Resizes PIL image to a maximum size specified maintaining the aspect ratio.
                     Allows usage of different resizing methods and does not modify the image in place,
                     then creates an exact square image.
                 """
-                w_fin, h_fin = self.options['size']
+                w_fin, h_fin = size
                 w_ini, h_ini = image.size
 
                 ini_aspect = float(w_ini) / float(h_ini)
@@ -285,25 +317,25 @@ class Editor(object):
                         image = image.resize((int((float(h_fin) * ini_aspect) + 0.5), h_fin), method)
 
                 ## Create background transparent image.
-                thumbnail = Image.new('RGBA', self.options['size'], (255, 255, 255, 0))
+                thumbnail = Image.new('RGBA', size, (255, 255, 255, 0))
                 thumbnail.paste(image, ((w_fin - image.size[0]) // 2, (h_fin - image.size[1]) // 2))
 
                 return thumbnail
 
-        def resize_exec(self, image_list):
-                """ Applies icon dimensions resize to image list and adjusts hotspots. """
-                w_fin, h_fin = self.options['size']
+        def resize_exec(self, image_list, size):
+                """ Applies icon dimensions resize to image list, gets it with hotspot scaled. """
+                w_fin, h_fin = size
                 w_ini, h_ini = image_list[0].size
                 scale_x = w_fin / w_ini
                 scale_y = h_fin / h_ini
 
-                image_list = [self.resize_meth(image_list[i], method = Image.ANTIALIAS) for i in range(self.parameters['count'])]
+                image_list = [self.resize_meth(image_list[i], size, method = Image.ANTIALIAS) for i in range(self.parameters['count'])]
 
                 ## Scale hotspots.
-                self.parameters['hotx'] = int(0.5 * ceil(2.0 * (self.parameters['hotx'] * scale_x)))
-                self.parameters['hoty'] = int(0.5 * ceil(2.0 * (self.parameters['hoty'] * scale_y)))
+                hotx = int(0.5 * ceil(2.0 * (self.parameters['hotx'] * scale_x)))
+                hoty = int(0.5 * ceil(2.0 * (self.parameters['hoty'] * scale_y)))
 
-                return image_list
+                return image_list, (hotx, hoty)
 
         def slice(self, image_strip):
                 """ Gets images from strip image. """
@@ -352,7 +384,7 @@ class Editor(object):
                 """ Executes some edit operations. """
                 if extended:
                         ## Save image strip (format: img0-1.png).
-                        path = os.path.join(process.original_dir, "img{:d}-{:d}.png".format(self.parameters['index'], self.parameters['status']))
+                        path = os.path.join(self.process.original_dir, "img{:d}-{:d}.png".format(self.parameters['index'], self.parameters['status']))
                         image.save(path, 'PNG')
                         ## Get every frame image from image strip.
                         image = self.slice(image)
@@ -360,15 +392,28 @@ class Editor(object):
                         if self.options['crop']:
                                 image = self.crop(image)
 
-                ## Resize.
+                ## Resize (every size from same cropped frames).
                 if self.options['size'] != (0, 0):
-                        image = self.resize_exec(image)
-                ## Colorize and save images (format: img0-1_0.png).
-                for i in range(self.parameters['count']):
-                        ima = self.colorize(image[i])
-                        path = os.path.join(process.original_dir, ("{}".format(custom) if custom else
-                                                                   "img{:d}-{:d}_{:d}.png".format(self.parameters['index'], self.parameters['status'], i)))
-                        ima.save(path, 'PNG')
+                        sized = [(size[0],) + self.resize_exec(image, size) for size in self.options['sizes']]
+                else:
+                        sized = [(image[0].size[0], image, (self.parameters['hotx'], self.parameters['hoty']))]
+
+                self.parameters['hotspots'] = OrderedDict()
+                for size, image, hotspot in sized:
+                        self.parameters['hotspots'][size] = hotspot
+                        ## Colorize and save images (format: img0-1_0.png).
+                        for i in range(self.parameters['count']):
+                                ima = self.colorize(image[i])
+                                path = self.process.frame_path(("{}".format(custom) if custom else
+                                                           "img{:d}-{:d}_{:d}.png".format(self.parameters['index'], self.parameters['status'], i)), size)
+                                if self.options['platform'] == 'Linux' and self.options['backend'] == 'native':
+                                        ## Native `X11` writer gets frames from memory.
+                                        self.process.frames[path] = ima
+                                else:
+                                        os.makedirs(os.path.dirname(path), exist_ok = True)
+                                        ima.save(path, 'PNG')
+                ## Hotspot of first size (`.cur`, `.ani`).
+                self.parameters['hotx'], self.parameters['hoty'] = sized[0][2]
 
 
 ## ______________________________________
@@ -377,23 +422,24 @@ class Editor(object):
 ##
 
 class Parser(object):
-        def __init__(self, parameters, options):
+        def __init__(self, parameters, process):
                 self.parameters = parameters
-                self.options = options
+                self.process = process
+                self.options = process.options
                 self.logger = logging.getLogger('Metamorphosis')
 
         def cfg_writer(self, cfg, script_index, script_interval, custom = ''):
                 """ Support for config files writing. """
                 towrite = ''
 
-                if self.options['platform'] == 'Linux':
-                        towrite += "{:d} {:d} {:d} ".format(self.options['size'][0], self.parameters['hotx'], self.parameters['hoty'])
+                name = "img{:d}-{:d}_{:d}{}".format(self.parameters['index'], self.parameters['status'], script_index, custom)
 
-                path = (process.icocur_dir if self.options['platform'] == 'Windows' else process.original_dir)
-                extension = ('.cur' if self.options['platform'] == 'Windows' else '.png')
-                towrite += os.path.join(path, "img{:d}-{:d}_{:d}{}{} {:d}\n".format(self.parameters['index'],
-                                                                                    self.parameters['status'], script_index, custom,
-                                                                                    extension, script_interval))
+                if self.options['platform'] == 'Linux':
+                        ## A line for every nominal size.
+                        for size, (hotx, hoty) in self.parameters['hotspots'].items():
+                                towrite += "{:d} {:d} {:d} {} {:d}\n".format(size, hotx, hoty, self.process.frame_path(name + '.png', size), script_interval)
+                else:
+                        towrite += os.path.join(self.process.icocur_dir, "{}.cur {:d}\n".format(name, script_interval))
                 cfg.write(towrite)
 
         def script(self, cfg, script_data):
@@ -450,13 +496,14 @@ class Parser(object):
 ##
 
 class Stardock(object):
-        def __init__(self, options):
-                self.options = options
+        def __init__(self, process):
+                self.process = process
+                self.options = process.options
                 self.logger = logging.getLogger('Metamorphosis')
 
         def strip_frames(self, image_strip):
                 """ Gets image strip frames and adjust them. """
-                editor = Editor(self.parameters, self.options)
+                editor = Editor(self.parameters, self.process)
                 editor.adjust(image_strip)
 
         def script_missing(self, cfg_file):
@@ -464,7 +511,7 @@ class Stardock(object):
                 self.logger.warning('Warning: script missing: fallback to default animation for image index #{:d}, status {:d}\n'
                                     .format(self.parameters['index'], self.parameters['status']))
                 ## Use default animation.
-                parser = Parser(self.parameters, self.options)
+                parser = Parser(self.parameters, self.process)
                 parser.animation(cfg_file)
 
         def script_exist(self, cfg_file, script_data):
@@ -479,7 +526,7 @@ class Stardock(object):
                                 self.logger.error('Error: cannot expand script --> script corrupted\n')
 
                 ## Parse script.
-                parser = Parser(self.parameters, self.options)
+                parser = Parser(self.parameters, self.process)
                 is_parsed = parser.script(cfg_file, script_data)
 
                 if not is_parsed:
@@ -526,7 +573,7 @@ class Stardock(object):
                 self.logger.info('Theme info:\n\n\t{}\n\n'.format(comment))
 
                 ## Creation subfolders under `targets` folder.
-                process.create_subfolders(theme_name)
+                self.process.create_subfolders(theme_name)
 
                 ## Start processing data.
                 cur_pos = info_size
@@ -577,7 +624,7 @@ Image size: {} x {}\n\tFrame interval: {}\n\tUnknown_3: {}\n\tAnimation type: {}
                         self.strip_frames(image_strip)
 
                         ## Create config file.
-                        with open(process.config(self.parameters), 'w') as cfg_file:
+                        with open(self.process.config(self.parameters), 'w') as cfg_file:
                                 if size_of_script > 0:
                                         script_data = data[cur_pos + size_of_header_without_script_1 : cur_pos + size_of_header_with_script].decode('utf-16le')[:-1]
                                         script_data = script_data.replace(';', '\n')
@@ -588,12 +635,12 @@ Image size: {} x {}\n\tFrame interval: {}\n\tUnknown_3: {}\n\tAnimation type: {}
                                         self.script_missing(cfg_file)
 
                         ## Generate.
-                        gen_instance = process.generate(self.parameters, theme_name)
+                        gen_instance = self.process.generate(self.parameters, theme_name)
 
                         cur_pos += size_of_header_and_image
 
                 ## Packing.
-                process.packing(gen_instance, theme_name, comment)
+                self.process.packing(gen_instance, theme_name, comment)
 
 
         def convert_XP(self, fileXP):
@@ -623,7 +670,7 @@ Image size: {} x {}\n\tFrame interval: {}\n\tUnknown_3: {}\n\tAnimation type: {}
                 self.logger.info('Theme info:\n\n\t{}\n\n'.format(comment))
 
                 ## Creation subfolders under `targets` folder.
-                process.create_subfolders(theme_name)
+                self.process.create_subfolders(theme_name)
 
                 ## Get "Scheme.ini" data indexes.
                 indexes = [scheme.index(line) for line in scheme if line.startswith('[') and line != '[General]']
@@ -707,24 +754,24 @@ Animation type: {}\n\tHotspot position: ({}, {})\n\tScript status: {}\n'
 
                                 ## Create config file (no script).
                                 if self.parameters['script'] == 0:
-                                        with open(process.config(self.parameters), 'w') as cfg_file:
+                                        with open(self.process.config(self.parameters), 'w') as cfg_file:
                                                 self.script_missing(cfg_file)
                                         ## Generate.
-                                        gen_instance = process.generate(self.parameters, theme_name)
+                                        gen_instance = self.process.generate(self.parameters, theme_name)
 
                         else:
                                 ## Create config file (with script).
                                 if self.parameters['script'] == 1:
-                                        with open(process.config(self.parameters), 'w') as cfg_file:
+                                        with open(self.process.config(self.parameters), 'w') as cfg_file:
                                                 script_data = scheme[indexes[i] + 1 : indexes[i + 1]]
                                                 script_data = [re.sub(r'(?:(?<=\,|-)\s*|\s*(?=\,|-))', '', ' '.join(line.replace(';', '').split()))
                                                                for line in script_data]
                                                 self.script_exist(cfg_file, script_data)
                                         ## Generate.
-                                        gen_instance = process.generate(self.parameters, theme_name)
+                                        gen_instance = self.process.generate(self.parameters, theme_name)
 
                 ## Packing.
-                process.packing(gen_instance, theme_name, comment)
+                self.process.packing(gen_instance, theme_name, comment)
 
 
 ## ___________________________________
@@ -733,18 +780,19 @@ Animation type: {}\n\tHotspot position: ({}, {})\n\tScript status: {}\n'
 ##
 
 class X11Cur(object):
-        def __init__(self, parameters):
+        def __init__(self, parameters, process):
                 self.parameters = parameters
+                self.process = process
                 self.logger = logging.getLogger('Metamorphosis')
 
         def path_output(self):
                 """ Defines output file path. """
                 try:
-                        custom_output = os.path.join(process.outputcurs_dir, self.parameters['custom'])
+                        custom_output = os.path.join(self.process.outputcurs_dir, self.parameters['custom'])
                         os.makedirs(custom_output, exist_ok = True)
                         return custom_output
                 except:
-                        return process.outputcurs_dir
+                        return self.process.outputcurs_dir
 
         def theme_file(self, theme_name, description):
                 """ Creates "index.theme" file. """
@@ -755,10 +803,89 @@ class X11Cur(object):
                             "Example=default\n" + \
                             "Inherits=core"
 
-                with open(os.path.join(process.output_dir, 'index.theme'), 'w') as file:
-                        file.write(themefile)
-                with open(os.path.join(process.output_dir, 'cursor.theme'), 'w') as file:
-                        file.write(themefile)
+                for name in ['index.theme', 'cursor.theme']:
+                        self.process.store(os.path.join(self.process.output_dir, name), self.process.text(themefile))
+
+        def frames(self, path_cfg):
+                """ Gets frames (nominal size, hotspot x, hotspot y, image, delay) listed in config file. """
+                frames = []
+                with open(path_cfg, 'r') as cfg_file:
+                        cfg_data = [line for line in cfg_file.read().splitlines() if line]
+
+                for line in cfg_data:
+                        ## Format line: size xhot yhot path delay.
+                        fields = line.split(' ')
+                        size, xhot, yhot = (int(field) for field in fields[0 : 3])
+                        path, delay = ' '.join(fields[3 : -1]), int(fields[-1])
+                        ## Frame kept in memory (not saved as `.png`) or saved.
+                        image = self.process.frames.get(path)
+                        if image is None:
+                                image = Image.open(path)
+                        frames.append((size, xhot, yhot, image, delay))
+
+                return frames
+
+        def premultiply(self, image):
+                """ Gets image pixels as ARGB premultiplied (32-bit little-endian), rounded down as `xcursorgen` does. """
+                r, g, b, a = image.convert('RGBA').split()
+                r, g, b = (ImageChops.multiply(band, a) for band in [r, g, b])
+
+                return Image.merge('RGBA', (r, g, b, a)).tobytes('raw', 'BGRA')
+
+        def xcursor(self, frames, comments):
+                """ Packs `X11` cursor chunks: file header, table of contents, images, comments (same layout of `xcursorgen`). """
+                ## file header -->  magic  | header size | version | ntocs |
+                ##                  'Xcur' |     16      | 0x10000 |       |
+                ## table of contents --> type | subtype | position (see `Mixed.convert_x112ani`).
+                ntocs = len(frames) + len(comments)
+                position = calcsize('<4s3L') + calcsize('<3L') * ntocs
+                tocs, chunks = ([] for _ in range(2))
+
+                for size, xhot, yhot, image, delay in frames:
+                        width, height = image.size
+                        if not (0 < width <= 0x7fff and 0 < height <= 0x7fff and xhot <= width and yhot <= height):
+                                raise ValueError('image size {} x {} or hotspot ({}, {}) not valid'.format(width, height, xhot, yhot))
+                        tocs.append(pack('<3L', 0xfffd0002, size, position))
+                        chunks.append(pack('<9L', 36, 0xfffd0002, size, 1, width, height, xhot, yhot, delay))
+                        chunks.append(self.premultiply(image))
+                        position += 36 + width * height * 4
+
+                for subtype, text in comments:
+                        text = text.encode('utf-8')
+                        tocs.append(pack('<3L', 0xfffe0001, subtype, position))
+                        chunks.append(pack('<5L', 20, 0xfffe0001, subtype, 1, len(text)))
+                        chunks.append(text)
+                        position += 20 + len(text)
+
+                return [pack('<4s3L', b'Xcur', 16, 0x10000, ntocs)] + tocs + chunks
+
+        def write_native(self, path_cfg, path_outcurs):
+                """ Writes `X11` cursor byte-by-byte, from frames in memory. """
+                try:
+                        self.process.store(path_outcurs, self.xcursor(self.frames(path_cfg), self.parameters.get('comments', [])))
+                except Exception as e:
+                        self.logger.error("Error: can't convert cursor #{:d} by native writer --> {}\n".format(self.parameters['index'], e))
+                        return False
+
+                return True
+
+        def write_xcursorgen(self, path_cfg, path_outcurs):
+                """ Writes `X11` cursor by `xcursorgen`, from saved `.png`s. """
+                proc = Popen('xcursorgen' + ' "' + path_cfg + '"' + ' "' + path_outcurs + '"', shell = True, stdout = PIPE, stderr = PIPE)
+                out, err = proc.communicate()
+                code = proc.wait()
+
+                if code != 0:
+                        err = ''.join(out.decode('ascii').splitlines())
+                        if err == '':
+                                err = '`xcursorgen` not installed or `xcursorgen` process trouble\n'
+                        self.logger.error("Error: can't convert cursor #{:d} by `xcursorgen` --> {}".format(self.parameters['index'], err))
+                        return False
+
+                if self.process.options['pack']:
+                        with open(path_outcurs, 'rb') as file:
+                                self.process.store(path_outcurs, [file.read()])
+                return True
 
         def convert(self):
                 """ Creates `X11` cursors, using `xcursorgen` or byte-by-byte writer. """
@@ -772,25 +899,22 @@ class X11Cur(object):
                         outfilename += '_pressed'
                         links = []
 
-                ## Try `xcursorgen` job.
-                path_cfg = ' "' + process.config(self.parameters) + '"'
-                path_outcurs = ' "' + os.path.join(self.path_output(), outfilename) + '"'
-                proc = Popen('xcursorgen' + path_cfg + path_outcurs, shell = True, stdout = PIPE, stderr = PIPE)
-                out, err = proc.communicate()
-                code = proc.wait()
-
-                if code != 0:
-                        err = ''.join(out.decode('ascii').splitlines())
-                        if err == '':
-                                err = '`xcursorgen` not installed or `xcursorgen` process trouble\n'
-                        self.logger.error("Error: can't convert cursor #{:d} by `xcursorgen` --> {}".format(self.parameters['index'], err))
+                path_cfg = self.process.config(self.parameters)
+                path_outcurs = os.path.join(self.path_output(), outfilename)
+                if self.process.options['backend'] == 'xcursorgen' and which('xcursorgen'):
+                        ## Try `xcursorgen` job.
+                        ok = self.write_xcursorgen(path_cfg, path_outcurs)
                 else:
-                        ok = True
+                        if self.process.options['backend'] == 'xcursorgen':
+                                self.logger.warning('Warning: `xcursorgen` not installed --> native writer used\n')
+                        ok = self.write_native(path_cfg, path_outcurs)
+
+                if ok:
                         for link in links:
                                 while True:
                                         path = os.path.join(self.path_output(), link)
                                         try:
-                                                os.symlink(outfilename, path)
+                                                self.process.store(path, link = outfilename)
                                                 break
                                         except FileExistsError:
                                                 os.remove(path)
@@ -805,18 +929,10 @@ class X11Cur(object):
                 """ Packages `X11` theme. """
                 self.theme_file(theme_name, description)
                 ## Create archive.
-                path_archive = ' "' + os.path.join(process.options['output'], "{}.tar.gz".format(theme_name)) + '"'
-                path_where = ' "{}" "{}"'.format(process.targets_dir, theme_name)
-
-                proc = Popen('tar -a -cf' + path_archive + ' -C' + path_where , shell = True, stdout = PIPE, stderr = PIPE)
-                out, err = proc.communicate()
-                code = proc.wait()
-
-                if code != 0:
-                        err = ''.join(out.decode('ascii').splitlines())
-                        if err == '':
-                                err = '`tar` not installed or `tar` process trouble\n'
-                        self.logger.error('Error: "{}" packaging skipped --> {}'.format(theme_name, err))
+                try:
+                        self.process.archive(theme_name, 'tar.gz')
+                except Exception as e:
+                        self.logger.error('Error: "{}" packaging skipped --> {}\n'.format(theme_name, e))
 
 
 ## _________________________________
@@ -825,8 +941,9 @@ class X11Cur(object):
 ##
 
 class MSCur(object):
-        def __init__(self, parameters):
+        def __init__(self, parameters, process):
                 self.parameters = parameters
+                self.process = process
                 self.logger = logging.getLogger('Metamorphosis')
 
         def natural(self, string):
@@ -836,14 +953,14 @@ class MSCur(object):
         def convert(self):
                 """ Executes Iconolatry for `.png`s to `.cur`s conversion. """
                 self.logger.info('\n<------>< Microsoft `.cur` files creation ><------>')
-                pngs = [[os.path.join(process.original_dir, png)] for png in os.listdir(process.original_dir)
+                pngs = [[os.path.join(self.process.original_dir, png)] for png in os.listdir(self.process.original_dir)
                         if "_" in png and re.search('img(.*)-(.*)_', png).groups() == (str(self.parameters['index']), str(self.parameters['status']))]
                 lung = len(pngs)
                 self.logger.info('\nConversion to `.cur` of set images index: {}, with status: {}\n'
                                  .format(self.parameters['index'], self.parameters['status']))
 
                 encocur = Iconolatry.Encode(pngs,
-                                            paths_icocur = [process.icocur_dir] * lung,
+                                            paths_icocur = [self.process.icocur_dir] * lung,
                                             names_icocur = [''] * lung,
                                             formats_icocur = [('.cur', self.parameters['hotx'], self.parameters['hoty'])] * lung)
 
@@ -861,8 +978,9 @@ class MSCur(object):
 ##
 
 class MSAni(object):
-        def __init__(self, parameters):
+        def __init__(self, parameters, process):
                 self.parameters = parameters
+                self.process = process
                 self.logger = logging.getLogger('Metamorphosis')
 
         def int2byte(self, value, byteorder = 'little', padbytes = 4):
@@ -903,9 +1021,10 @@ class MSAni(object):
                 ## Create file `.inf`.
                 self.inf_file(theme_name, description)
                 ## Do package.
-                make_archive(os.path.join(process.options['output'], theme_name), 'zip',
-                             root_dir = process.output_dir,
-                             base_dir = None)
+                try:
+                        self.process.archive(theme_name, 'zip')
+                except Exception as e:
+                        self.logger.error('Error: "{}" packaging skipped --> {}\n'.format(theme_name, e))
 
         def inf_file(self, theme_name, description):
                 """ Creates `.inf` file for Windows installation. """
@@ -936,8 +1055,7 @@ class MSAni(object):
                                              '{:<{align}} = "{}"\n'.format('SCHEME_NAME', theme_name, align = align) + \
                                              '{}'.format(string_cur)
 
-                with open(os.path.join(process.output_dir, 'Install.inf'), 'w') as file:
-                        file.write(scheme_inf)
+                self.process.store(os.path.join(self.process.output_dir, 'Install.inf'), self.process.text(scheme_inf))
 
         def find_value(self, data, position):
                 """ Gets chunk values. """
@@ -979,7 +1097,7 @@ class MSAni(object):
                 self.logger.info('<------>< Microsoft `.ani` file creation ><------>\n')
 
                 ## Get parameters from config file.
-                with open(process.config(self.parameters), 'r') as cfg_file:
+                with open(self.process.config(self.parameters), 'r') as cfg_file:
                         cfg_data = cfg_file.readlines()
                 cfg_data = [line.replace('\n', '') for line in cfg_data]
 
@@ -1005,7 +1123,7 @@ class MSAni(object):
                         path, rate = line.split(' ')
                         path_list.append(path)
                         rate_list.append(int(rate))
-                        seq = re.search('_(.*).cur', path).group(1)
+                        seq = re.search('_(.*).cur', os.path.basename(path)).group(1)
                         seq_list.append(int(seq))
 
                 nframes = self.int2byte(self.parameters['count'])
@@ -1070,8 +1188,8 @@ class MSAni(object):
                 ani_header += b'LIST' + b'\x00\x00\x00\x00' + b'fram' # 'LIST' - LIST size - 'fram'
 
                 ## Do process.
-                ani_path = os.path.join(process.outputcurs_dir, ani_name + '.ani')
-                with open(ani_path, 'wb+') as ani_file:
+                ani_path = os.path.join(self.process.outputcurs_dir, ani_name + '.ani')
+                with BytesIO() as ani_file:
                         ## Write `.ani` header.
                         ani_file.write(ani_header)
                         ## Write 'icon' and his size identifier then data, for all `.cur`s.
@@ -1091,6 +1209,7 @@ class MSAni(object):
                         list_size = riff_size - (offset - 4)
                         ani_file.seek(offset)
                         ani_file.write(self.int2byte(list_size))
+                        self.process.store(ani_path, [ani_file.getvalue()])
 
                 self.logger.info('{} ----> Done !!\n'.format(ani_path))
 
@@ -1101,13 +1220,14 @@ class MSAni(object):
 ##
 
 class Mixed(object):
-        def __init__(self, options):
-                self.options = options
+        def __init__(self, process):
+                self.process = process
+                self.options = process.options
                 self.logger = logging.getLogger('Metamorphosis')
 
         def adjust(self, image, name):
                 """ Adjusts single image (only resize and recolor) and save. """
-                editor = Editor(self.parameters, self.options)
+                editor = Editor(self.parameters, self.process)
                 editor.adjust([image], extended = False, custom = name)
 
         def work(self, result, result_index, seq_value, rate_value, order):
@@ -1147,8 +1267,8 @@ class Mixed(object):
 
                                         ## Create config file.
                                         self.parameters['custom'] = ("_{:d}".format(order[entry]) if len(result) > 1 else "")
-                                        with open(process.config(self.parameters), 'a') as cfg_file:
-                                                parser = Parser(self.parameters, self.options)
+                                        with open(self.process.config(self.parameters), 'a') as cfg_file:
+                                                parser = Parser(self.parameters, self.process)
                                                 parser.cfg_writer(cfg_file, seq_value, rate_value, custom = self.parameters['custom'])
                 else:
                         if isinstance(subresult, list):
@@ -1170,7 +1290,7 @@ class Mixed(object):
                         return (None, comments)
 
                 ## Creation subfolders under `targets` folder.
-                process.create_subfolders(theme_name)
+                self.process.create_subfolders(theme_name)
 
                 ## Define parameters.
                 self.parameters = {'index'    : image_index,
@@ -1190,7 +1310,7 @@ class Mixed(object):
 
                         ## Conversion `.cur` --> `.png`
                         decocur = Iconolatry.Decode([fileMS],
-                                                    paths_image = [process.original_dir],
+                                                    paths_image = [self.process.original_dir],
                                                     names_image = [name],
                                                     formats_image = ['.png'],
                                                     rebuild = True)
@@ -1203,7 +1323,7 @@ class Mixed(object):
                                 data = file.read()
 
                         ## Find 'anih' parameters.
-                        msani = MSAni(None)
+                        msani = MSAni(None, self.process)
                         pos_anih = re.search(b'anih', data).start()
 
                         (nframes, nsteps, iwidth, iheight,
@@ -1216,6 +1336,8 @@ class Mixed(object):
                                 ## Get `.ani` complete comment.
                                 if comment not in comments:
                                         comments.append(comment)
+                                ## Keep it in `X11` cursor (subtype OTHER).
+                                self.parameters['comments'] = [(3, value) for value in [inam, iart] if value]
 
                         rate, seq = msani.find_rate_seq(data)
 
@@ -1248,7 +1370,7 @@ class Mixed(object):
 
                         ## Conversion `.cur` --> `.png`
                         decocur = Iconolatry.Decode(streams,
-                                                    paths_image = [process.original_dir] * self.parameters['count'],
+                                                    paths_image = [self.process.original_dir] * self.parameters['count'],
                                                     names_image = names,
                                                     formats_image = ['.png'] * self.parameters['count'],
                                                     rebuild = True)
@@ -1274,10 +1396,10 @@ Animation type: {}\n\tSequence chunk: {}\n\tRate chunk: {}\n\t'
                         for num in ord_val:
                                 self.parameters['custom'] = "{:d}_{:d}".format(self.parameters['index'], num)
                                 self.logger.info('\nMulti-size / Multi-depth set: {}:'.format(self.parameters['custom']))
-                                gen_instance = process.generate(self.parameters, theme_name)
+                                gen_instance = self.process.generate(self.parameters, theme_name)
                 else:
                         self.parameters['custom'] = ""
-                        gen_instance = process.generate(self.parameters, theme_name)
+                        gen_instance = self.process.generate(self.parameters, theme_name)
 
                 return gen_instance, comments
 
@@ -1296,7 +1418,7 @@ Animation type: {}\n\tSequence chunk: {}\n\tRate chunk: {}\n\t'
                         return (None, comments)
 
                 ## Creation subfolders under `targets` folder.
-                process.create_subfolders(theme_name)
+                self.process.create_subfolders(theme_name)
 
                 ## Read data from file.
                 with open(fileX11, 'rb') as file:
@@ -1315,17 +1437,23 @@ Animation type: {}\n\tSequence chunk: {}\n\tRate chunk: {}\n\t'
                 ## list_of_tocs -->    type     |               subtype                     |        position          |
                 ##                  0xfffe0001  | { 1 (COPYRIGHT), 2 (LICENSE), 3 (OTHER) } |  absolute byte position  |
                 ##                  0xfffd0002  |           nominal dimension               |     of table in file     |
-                pos_images, pos_comments = ([] for _ in range(2))
+                pos_sizes, pos_comments = (OrderedDict(), [])
                 for num in range(ntocs):
                         offset = num * 12
                         identify = data[16 + offset : 20 + offset]
-                        get, = unpack_from('<L', data[24 + offset : 28 + offset])
+                        nominal, get = unpack_from('<2L', data[20 + offset : 28 + offset])
 
                         if identify == b'\x02\x00\xfd\xff':
-                                pos_images.append(get)
+                                pos_sizes.setdefault(nominal, []).append(get)
                         elif identify == b'\x01\x00\xfe\xff':
                                 pos_comments.append(get)
 
+                ## Frames of a multi-size cursor: only nominal size closest to `.ani` size (the larger, if tie).
+                pos_images = []
+                if pos_sizes:
+                        nominal = min(pos_sizes, key = lambda size: (abs(size - self.options['size'][0]), -size))
+                        pos_images = pos_sizes[nominal]
+
                 ## chunks --> common header fields:
                 ## header (bytes) |    type    |              subtype                      | version |
                 ##       20       | 0xfffe0001 | { 1 (COPYRIGHT), 2 (LICENSE), 3 (OTHER) } |    1    |
@@ -1358,7 +1486,7 @@ Animation type: {}\n\tSequence chunk: {}\n\tRate chunk: {}\n\t'
                         comments.append(comment)
 
                 ## Get images.
-                msani = MSAni(None)
+                msani = MSAni(None, self.process)
                 self.parameters.update({'count' : len(pos_images),
                                         'anim'  : (0 if len(pos_images) == 1 else 2)
                                         })
@@ -1379,11 +1507,8 @@ Animation type: {}\n\tSequence chunk: {}\n\tRate chunk: {}\n\t'
                                                         'interval' : frame_interval
                                                         })
 
-                        try:
-                                image = Image.frombytes('RGBA', (image_width, image_height), data[pos + 36 : pos_images[i + 1]], 'raw', 'BGRA', 0, 1)
-                        except:
-                                # get last.
-                                image = Image.frombytes('RGBA', (image_width, image_height), data[pos + 36 : len(data)], 'raw', 'BGRA', 0, 1)
+                        image = Image.frombytes('RGBA', (image_width, image_height), data[pos + 36 : pos + 36 + image_width * image_height * 4],
+                                                'raw', 'BGRA', 0, 1)
 
                         ## Log specific info.
                         self.logger.info(u'\tData {}:\n\t\tFrame Interval: {}\t\t Image size: {} x {}\t\tHotspot position: ({}, {})'
@@ -1396,12 +1521,12 @@ Animation type: {}\n\tSequence chunk: {}\n\tRate chunk: {}\n\t'
                 self.parameters['count'] = len(pos_images) # re-assign for further processing.
 
                 ## Use default animation.
-                with open(process.config(self.parameters), 'w') as cfg_file:
-                        parser = Parser(self.parameters, self.options)
+                with open(self.process.config(self.parameters), 'w') as cfg_file:
+                        parser = Parser(self.parameters, self.process)
                         parser.animation(cfg_file)
 
                 ## Generate.
-                gen_instance = process.generate(self.parameters, theme_name)
+                gen_instance = self.process.generate(self.parameters, theme_name)
 
                 return gen_instance, comments
 
@@ -1435,15 +1560,23 @@ class Process(object):
                 os.chmod(path, S_IWRITE)
                 func(path)
 
+        def workspace_root(self):
+                """ Defines where job workspace is created (RAM-backed `/dev/shm`, if asked and available). """
+                shm = '/dev/shm'
+                if self.options['ram'] and os.path.isdir(shm) and os.access(shm, os.W_OK):
+                        return shm
+                return gettempdir()
+
         def clean(self, redo = True):
-                """ Deletes job temp folders."""
+                """ Creates new input temp folders (previous ones deleted at once only if `discard`, else with workspace). """
                 if not ((self.is_folder_anicur is True) or (self.is_folder_x11 is True)):
-                        try:
-                                rmtree(self.temp_dir, onerror = self.remove_readonly)
-                        except OSError:
-                                pass
-                        if redo:
-                                os.makedirs(self.temp_dir, exist_ok = True)
+                        if self.temp_dir and self.options['discard']:
+                                try:
+                                        rmtree(self.temp_dir, onerror = self.remove_readonly)
+                                except OSError:
+                                        pass
+                        self.temp_dir = (mkdtemp(dir = self.workspace_dir) if redo else '')
+                        self.members = OrderedDict()
 
         def handle_time(self, time, done = 0):
                 """ Formats process time. """
@@ -1526,11 +1659,9 @@ class Process(object):
                         os.makedirs(path, exist_ok = True)
 
         def create_log(self):
-                """ Creates logging file. """
-                logname = os.path.join(self.options['output'], 'Metamorphosis.log')
+                """ Creates logging file (one for every job). """
+                logname = os.path.join(self.options['output'], 'Metamorphosis_{}_{:d}.log'.format(strftime('%Y%m%d-%H%M%S'), os.getpid()))
 
-                if os.path.exists(logname):
-                        os.remove(logname)
                 self.logger = logging.getLogger('Metamorphosis')
                 formatter = logging.Formatter('%(message)s')
                 filehandler = logging.FileHandler(logname, mode = 'a')
@@ -1558,12 +1689,12 @@ class Process(object):
                 """ Generates `X11` / `.ani` cursor from current image. """
                 if self.options['platform'] == 'Linux':
                         ## Generate `X11` (Linux).
-                        gen_instance = X11Cur(parameters)
+                        gen_instance = X11Cur(parameters, self)
                         gen_instance.convert()
                 elif self.options['platform'] == 'Windows':
                         ## Generate `.ani` (Windows).
-                        MSCur(parameters).convert()
-                        gen_instance = MSAni(parameters)
+                        MSCur(parameters, self).convert()
+                        gen_instance = MSAni(parameters, self)
                         gen_instance.convert(self.options['size'], theme_name)
 
                 return gen_instance
@@ -1593,14 +1724,96 @@ class Process(object):
                 except:
                         name_cfg = "img{:d}-{:d}.cfg".format(parameters['index'], parameters['status'])
 
-                return os.path.join(process.cfg_dir, name_cfg)
+                return os.path.join(self.cfg_dir, name_cfg)
+
+        def text(self, string):
+                """ Encodes text file content, as written in text mode. """
+                return [string.replace('\n', os.linesep).encode(getpreferredencoding(False))]
+
+        def store(self, path, chunks = None, link = None):
+                """ Writes output file (`chunks` of bytes) or symlink (to `link`),
+                    when packing keeps it in memory for archive instead.
+                """
+                if self.options['pack']:
+                        self.members[path] = (chunks, link)
+                elif link:
+                        os.symlink(link, path)
+                else:
+                        with open(path, 'wb') as file:
+                                file.writelines(chunks)
+
+        def archive(self, theme_name, frmt):
+                """ Writes kept files and symlinks of theme to `.tar.gz` (under theme folder) or `.zip` archive.
+                    If reproducible, members are sorted and with fixed time (owners are always fixed).
+                """
+                base = (self.targets_dir if frmt == 'tar.gz' else self.output_dir)
+                members, folders = [], OrderedDict()
+                for path, (chunks, link) in self.members.items():
+                        name = os.path.relpath(path, base).replace(os.sep, '/')
+                        if not name.startswith('..'):
+                                members.append((name, (b''.join(chunks) if chunks else b''), link))
+                                ## Parent folders too.
+                                parts = name.split('/')[: -1]
+                                for i in range(len(parts)):
+                                        folders['/'.join(parts[: i + 1])] = None
+                folders = list(folders)
+
+                if self.options['reproducible']:
+                        members.sort()
+                        folders.sort()
+                        # 1980-01-01, minimum of `.zip`.
+                        mtime = 315532800
+                        date_time = gmtime(mtime)[: 6]
+                else:
+                        mtime = int(time())
+                        date_time = localtime(mtime)[: 6]
+
+                path_archive = os.path.join(self.options['output'], "{}.{}".format(theme_name, frmt))
+                if frmt == 'tar.gz':
+                        with open(path_archive, 'wb') as file, \
+                             GzipFile(filename = '', mode = 'wb', fileobj = file, compresslevel = self.options['level'], mtime = mtime) as gzip, \
+                             TarFile(fileobj = gzip, mode = 'w') as tar:
+                                for name, data, link in [(folder, None, None) for folder in folders] + members:
+                                        info = TarInfo(name)
+                                        info.mtime, info.uid, info.gid, info.uname, info.gname = mtime, 0, 0, 'root', 'root'
+                                        if data is None:
+                                                info.type, info.mode = DIRTYPE, 0o755
+                                        elif link:
+                                                info.type, info.mode, info.linkname = SYMTYPE, 0o777, link
+                                        else:
+                                                info.mode, info.size = 0o644, len(data)
+                                        tar.addfile(info, (BytesIO(data) if data else None))
+                elif frmt == 'zip':
+                        with ZipFile(path_archive, 'w', ZIP_DEFLATED, compresslevel = self.options['level']) as zip:
+                                for name, data, link in [(folder + '/', None, None) for folder in folders] + members:
+                                        info, compress = ZipInfo(name, date_time), ZIP_DEFLATED
+                                        if data is None:
+                                                info.external_attr, compress = (0o40755 << 16) | 0x10, ZIP_STORED
+                                        elif link:
+                                                info.external_attr = 0o120777 << 16
+                                                data = link.encode('utf-8')
+                                        else:
+                                                info.external_attr = 0o100644 << 16
+                                        zip.writestr(info, (data or b''), compress_type = compress, compresslevel = self.options['level'])
+
+                ## Forget theme members.
+                self.members = OrderedDict()
+
+        def frame_path(self, name, size):
+                """ Defines frame image path (a folder for every nominal size, if more). """
+                if len(self.options['sizes']) > 1:
+                        return os.path.join(self.original_dir, "{:d}".format(size), name)
+                return os.path.join(self.original_dir, name)
+
+        def find_stardock(self, file):
+                """ Checks if a file is Stardock cursor theme. """
+                return file.lower().endswith(('.cursorfx', '.curxptheme'))
 
         def work_setup(self, file):
                 """ Setups global processing operations. """
                 self.clean(redo = True)
                 self.create_folders()
-
-                return (True if file.lower().endswith(('.cursorfx', '.curxptheme')) else False)
+                self.frames = {}
 
         def work_stardock(self, path, file):
                 """ Runs Stardock files processing. """
@@ -1608,7 +1821,7 @@ class Process(object):
                 print('{} Start Processing #{:d}:{}`{}`'.format(self.larrw, self.nproc, self.blank, file))
                 self.logger.info(self.handle_header(self.nproc))
 
-                stardock = Stardock(self.options)
+                stardock = Stardock(self)
 
                 if file.lower().endswith('.cursorfx'):
                         stardock.convert_FX(path)
@@ -1652,7 +1865,7 @@ class Process(object):
 
         def work_anix11(self, file, theme_name, comments):
                 """ Runs `.ani`, `.cur` or `X11` unpaired / folder(s) file(s) processing. """
-                mixed = Mixed(self.options)
+                mixed = Mixed(self)
                 if self.options['platform'] == 'Linux':
                         gen_instance, comments = mixed.convert_ani2x11(file, theme_name, comments)
                 elif self.options['platform'] == 'Windows':
@@ -1660,28 +1873,68 @@ class Process(object):
 
                 return gen_instance, comments
 
-        def main(self):
-                """ Main process. """
-                ## Define conversion job temp path.
-                self.temp_dir = os.path.join(gettempdir(), 'Metamorphosis')
-                ## Define converted stuff output path.
-                self.options['output'] = os.path.abspath(os.path.expanduser(self.options['output']))
-                if self.options['output'].startswith('\\'):
-                        self.options['output'] = 'C:' + self.options['output']
-                os.makedirs(self.options['output'], exist_ok = True)
-
-                ## Create initial variables for process.
-                self.folder_name, self.old_folder_name = ('' for _ in range(2))
-                self.nproc, self.nfold = (0 for _ in range(2))
+        def job_stardock(self, path, file):
+                """ Runs Stardock file conversion job. """
+                tic = perf_counter()
+                self.work_setup(file)
+                self.work_stardock(path, file)
+                ## Get total process time elapsed - (`stardock` files).
+                toc = perf_counter()
+                self.handle_time(ceil(toc - tic))
+
+        def job_unpaired(self, file, theme_name):
+                """ Runs `.ani`, `.cur` or `X11` unpaired file conversion job. """
+                tic = perf_counter()
+                self.work_setup(file)
+                self.logger.info(self.handle_header(self.nproc))
+                self.work_anix11(file, theme_name, [])
+                ## Get total process time elapsed - (`.ani` or `X11` unpaired).
+                # Note: `.ani` or `X11` unpaired: no need to pack and create installation files.
+                toc = perf_counter()
+                self.handle_time(ceil(toc - tic))
+
+        def job_folder(self, theme_name, files):
+                """ Runs `.ani`, `.cur` or `X11` folder files conversion job (and eventually packing). """
+                subtimes, comments = ([] for _ in range(2))
+                ## All folder files share temp folders.
+                self.is_folder_anicur, self.is_folder_x11 = ('?', '?')
+                self.work_setup(theme_name)
+                for file, header in files:
+                        tic = perf_counter()
+                        self.frames = {}
+                        self.logger.info(self.handle_header(header))
+                        gen_instance, comments = self.work_anix11(file, theme_name, comments)
+                        ## Get partial subprocess time elapsed.
+                        toc = perf_counter()
+                        subtimes.append(ceil(toc - tic))
+
+                ## Get total process time elapsed / and eventually packing.
+                self.handle_time(sum(subtimes), len(subtimes))
+                if gen_instance:
+                        self.packing(gen_instance, theme_name, '\n'.join(comments))
+
+        def dispatch(self, job, *args):
+                """ Runs conversion job, at once or in process pool (its output kept in input order). """
+                if self.pool is None:
+                        getattr(self, job)(*args)
+                else:
+                        state = {key : getattr(self, key) for key in ['nproc', 'nsubproc', 'nfold', 'workspace_dir']}
+                        self.console.queue.append(self.pool.submit(convert_job, (self.options, state, job, args)))
+                        self.console.emit()
+
+        def variables(self):
+                """ Creates initial variables for process. """
+                self.folder_name, self.old_folder_name, self.temp_dir = ('' for _ in range(3))
+                self.nproc, self.nsubproc, self.nfold = (0 for _ in range(3))
                 self.is_folder_anicur, self.is_folder_x11 = ('?' for _ in range(2))
-                subtimes, unique, comments = ([] for _ in range(3))
+                self.members = OrderedDict()
                 self.blank = '\t\t '
                 self.larrw, self.sarrw = ('-' * 6 + '>', '-' * 3 + '>')
+                self.logger = logging.getLogger('Metamorphosis')
 
-                ## Create log file.
-                self.create_log()
-                ## Do conversion.
-                print('\nMetamorphosis working...')
+        def work(self):
+                """ Processes all inputs. """
+                unique, files = ([] for _ in range(2))
                 for file_dir in self.options['input']:
                         print('\n{} Processing Input    #{:d}:{}`{}`'.format(self.sarrw, self.nfold, self.blank, file_dir))
                         if not os.path.exists(file_dir):
@@ -1693,11 +1946,8 @@ class Process(object):
                                 #######################
                                 # is an unpaired file #
                                 #######################
-                                tic = perf_counter()
                                 self.nproc = self.nfold
 
-                                is_stardock = self.work_setup(file_dir)
-
                                 ## Check duplicate files.
                                 filehash = md5(open(file_dir, 'rb').read()).hexdigest()
                                 if filehash not in unique:
@@ -1707,21 +1957,14 @@ class Process(object):
                                         self.finish(file_dir)
                                         continue
 
-                                if is_stardock:
-                                        self.work_stardock(file_dir, file_dir)
+                                if self.find_stardock(file_dir):
+                                        self.dispatch('job_stardock', file_dir, file_dir)
                                 else:
                                         is_continue = self.work_anix11_setup(file_dir)
                                         if is_continue:
                                                 continue
 
-                                        self.logger.info(self.handle_header(self.nproc))
-
-                                        self.work_anix11(file_dir, 'Input_' + str(self.nfold), comments)
-
-                                ## Get total process time elapsed (`stardock` or `.ani` or `X11` files).
-                                # Note: `.ani` or `X11` unpaired: no need to pack and create installation files.
-                                toc = perf_counter()
-                                self.handle_time(ceil(toc - tic))
+                                        self.dispatch('job_unpaired', file_dir, 'Input_' + str(self.nfold))
 
                         else:
                                 #####################
@@ -1737,11 +1980,10 @@ class Process(object):
 
                                         if numsep < 2:
                                                 for filename in filenames:
-                                                        tic = perf_counter()
                                                         pathfile = os.path.join(dirpath, filename)
                                                         self.folder_name = os.path.basename(dirpath)
 
-                                                        is_stardock = self.work_setup(filename)
+                                                        is_stardock = self.find_stardock(filename)
 
                                                         ## Check duplicate files.
                                                         filehash = md5(open(pathfile, 'rb').read()).hexdigest()
@@ -1757,10 +1999,7 @@ class Process(object):
 
                                                         if is_stardock:
                                                                 if numsep == 0:
-                                                                        self.work_stardock(pathfile, filename)
-                                                                        ## Get total process time elapsed - (`stardock` files).
-                                                                        toc = perf_counter()
-                                                                        self.handle_time(ceil(toc - tic))
+                                                                        self.dispatch('job_stardock', pathfile, filename)
                                                                         self.nproc += 1
                                                                 elif numsep == 1:
                                                                         self.is_folder_anicur, self.is_folder_x11 = ('?', '?')
@@ -1781,36 +2020,109 @@ class Process(object):
                                                                                 continue
 
                                                                         self.handle_folders(filename, self.options['platform'])
-                                                                        self.logger.info(self.handle_header('{:d}.{:d}'.format(self.nproc - 1, self.nsubproc)))
-
-                                                                        gen_instance, comments = self.work_anix11(pathfile, self.folder_name, comments)
-
-                                                                        ## Get partial subprocess time elapsed - (`.ani`, `.cur` or `X11` folders).
-                                                                        toc = perf_counter()
-                                                                        subtimes.append(ceil(toc - tic))
+                                                                        files.append((pathfile, '{:d}.{:d}'.format(self.nproc - 1, self.nsubproc)))
 
                                                 ## Get total process time elapsed / and eventually packing - (`.ani`, `.cur` or `X11` folders).
                                                 if (self.is_folder_anicur is True) or (self.is_folder_x11 is True):
-                                                        if subtimes:
-                                                                self.handle_time(sum(subtimes), len(subtimes))
-                                                                if gen_instance:
-                                                                        self.packing(gen_instance, self.folder_name, '\n'.join(comments))
+                                                        if files:
+                                                                self.dispatch('job_folder', self.folder_name, files)
                                                         else:
                                                                 print('{} Process{}#{:d}:{}complete. Converted {:d}/{:d}.'.format(self.larrw, self.blank,
                                                                                                                                   self.nproc - 1, self.blank,
                                                                                                                                   0, self.nsubproc))
                                                 ## Reset for next step - (`.ani`, `.cur` or `X11` folders).
-                                                subtimes, comments = ([] for _ in range(2))
+                                                files = []
+                                                self.is_folder_anicur, self.is_folder_x11 = ('?', '?')
                                         else:
                                                 nested = str(os.path.sep).join(dirpath.split(os.path.sep)[-numsep:])
                                                 self.abort_proc(nested, 'too much nested folder', add = 'folder')
                         ## Increment.
                         self.finish(file_dir)
+
+        def main(self):
+                """ Main process. """
+                ## Define conversion job temp workspace (unique, for concurrent runs).
+                self.workspace = TemporaryDirectory(prefix = 'Metamorphosis_', dir = self.workspace_root())
+                self.workspace_dir = self.workspace.name
+                ## Define converted stuff output path.
+                self.options['output'] = os.path.abspath(os.path.expanduser(self.options['output']))
+                if self.options['output'].startswith('\\'):
+                        self.options['output'] = 'C:' + self.options['output']
+                os.makedirs(self.options['output'], exist_ok = True)
+
+                ## Create initial variables for process.
+                self.variables()
+                ## Create log file.
+                self.create_log()
+                ## Do conversion.
+                print('\nMetamorphosis working...')
+                if self.options['jobs'] > 1:
+                        ## Independent themes in process pool, console and log output kept in input order.
+                        self.console = Console(self.logger)
+                        with ProcessPoolExecutor(max_workers = self.options['jobs']) as self.pool, redirect_stdout(self.console):
+                                self.work()
+                                self.console.emit(wait = True)
+                else:
+                        self.pool = None
+                        self.work()
                 ## Complete.
                 self.clean(redo = False)
+                self.workspace.cleanup()
                 print("\nMetamorphosis finished.")
 
 
+## ________________________
+##| Process pool functions |---------------------------------------------------------------------------------------------------------------------------------
+##|________________________|
+##
+
+class Console(object):
+        def __init__(self, logger):
+                self.logger = logger
+                self.stdout = sys.stdout
+                self.queue = deque()
+
+        def write(self, text):
+                """ Keeps main process console output. """
+                self.queue.append(text)
+
+        def flush(self):
+                pass
+
+        def emit(self, wait = False):
+                """ Prints (and logs) queued output, until first job not finished. """
+                while self.queue and (wait or isinstance(self.queue[0], str) or self.queue[0].done()):
+                        item = self.queue.popleft()
+                        if isinstance(item, str):
+                                self.stdout.write(item)
+                        else:
+                                text, records = item.result()
+                                self.stdout.write(text)
+                                for level, msg in records:
+                                        self.logger.log(level, msg)
+                self.stdout.flush()
+
+def convert_job(job):
+        """ Runs a conversion job in a worker process; returns its console output and log records. """
+        options, state, name, args = job
+        logger = logging.getLogger('Metamorphosis')
+        handler = BufferingHandler(capacity = float('inf'))
+        logger.handlers = [handler]
+        logger.setLevel(logging.INFO)
+
+        worker = Process(options)
+        worker.variables()
+        for key, value in state.items():
+                setattr(worker, key, value)
+        with redirect_stdout(StringIO()) as console:
+                getattr(worker, name)(*args)
+        ## Delete job temp folders.
+        worker.is_folder_anicur, worker.is_folder_x11 = ('?', '?')
+        worker.clean(redo = False)
+
+        return console.getvalue(), [(record.levelno, record.getMessage()) for record in handler.buffer]
+
+
 if __name__ == "__main__":
         options = metamorphosis_parser()
         process = Process(options)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Times `Encode.extract` (open and parameters of an input image) on 256 px sources: RGBA, RGB, L, P `.png` and RGB `.bmp`.
+    Compare two trees with `--module`, example: `git show <commit>:Iconolatry.py > /tmp/old/Iconolatry.py`,
+    then `python benchmarks/bench_extract.py --module /tmp/old/Iconolatry.py`.
+"""
+
+import os
+import argparse
+import importlib.util
+from time import perf_counter
+from tempfile import TemporaryDirectory
+
+from PIL import Image
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+def load_module(path):
+        """ Imports `Iconolatry` from a path. """
+        spec = importlib.util.spec_from_file_location('Iconolatry', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+def make_sources(folder, size):
+        """ Saves fixed sources (gradients, so not trivially compressible) and gets their paths. """
+        red = Image.linear_gradient('L').resize((size, size))
+        green = red.rotate(90)
+        blue = Image.radial_gradient('L').resize((size, size))
+        alpha = red.rotate(45, fillcolor = 255)
+        rgba = Image.merge('RGBA', (red, green, blue, alpha))
+        sources = {'RGBA.png' : rgba,
+                   'RGB.png'  : rgba.convert('RGB'),
+                   'L.png'    : rgba.convert('L'),
+                   'P.png'    : rgba.convert('RGB').quantize(256),
+                   'RGB.bmp'  : rgba.convert('RGB')}
+        paths = []
+        for name, image in sources.items():
+                path = os.path.join(folder, name)
+                image.save(path)
+                paths.append(path)
+        return paths
+
+def bench(module, path, runs):
+        """ Gets mean time (ms) of `extract` on a source, or error message. """
+        encoder = module.Encode.__new__(module.Encode)
+        encoder.path_icocur = ""
+        tic = perf_counter()
+        for _ in range(runs):
+                encoder.parameters, encoder.all_icocur_written = {}, {}
+                try:
+                        # older trees have `extract(path)`.
+                        if encoder.extract.__code__.co_argcount == 3:
+                                image = encoder.extract(path, path)
+                        else:
+                                image = encoder.extract(path)
+                except module.EncodeErr as e:
+                        return e.msg
+                image.load()
+        return '{:.2f} ms'.format((perf_counter() - tic) / runs * 1000)
+
+if __name__ == "__main__":
+        parser = argparse.ArgumentParser(description = __doc__)
+        parser.add_argument('-m', '--module', default = os.path.join(os.path.dirname(here), 'Iconolatry.py'),
+                            help = "Path of `Iconolatry.py` to time. Default is this tree.")
+        parser.add_argument('-r', '--runs', type = int, default = 50,
+                            help = "Runs for every source. Default is `50`.")
+        parser.add_argument('-s', '--size', type = int, default = 256,
+                            help = "Size of sources (pixels). Default is `256`.")
+        args = parser.parse_args()
+
+        module = load_module(os.path.abspath(args.module))
+        with TemporaryDirectory() as folder:
+                print('{:<10} {:>12}'.format('source', 'extract'))
+                for path in make_sources(folder, args.size):
+                        print('{:<10} {:>12}'.format(os.path.basename(path), bench(module, path, args.runs)))
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+
+import Iconolatry
+
+## Widths with AND mask rows needing padding (1 bit per pixel, rows of 4 bytes) and not.
+sizes = [(1, 1), (5, 3), (8, 2), (13, 7), (20, 4), (31, 5), (32, 32), (33, 6)]
+
+def bgra(width, height, seed):
+        """ Makes random 32-bit BGRA image data, with fully transparent, partial and opaque alpha. """
+        rnd = random.Random(seed)
+        data = bytearray(rnd.getrandbits(8) for _ in range(width * height * 4))
+        data[3 :: 4] = bytes(rnd.choice([0, 0, 1, 128, 255]) for _ in range(width * height))
+        return bytes(data)
+
+@pytest.mark.parametrize('width, height', sizes)
+@pytest.mark.parametrize('seed', range(3))
+def test_compute_AND_mask(width, height, seed):
+        """ Bulk AND mask equals pure-Python reference. """
+        mask, xordata = Iconolatry.Mask(), bgra(width, height, seed)
+        assert mask.compute_AND_mask(width, height, xordata) == mask.compute_AND_mask_py(width, height, xordata)
+
+@pytest.mark.parametrize('width, height', sizes)
+@pytest.mark.parametrize('seed', range(3))
+def test_check_AND_mask(width, height, seed):
+        """ Bulk AND mask check agrees with pure-Python reference: on good mask, on one pixel flipped and on random mask. """
+        mask, xordata = Iconolatry.Mask(), bgra(width, height, seed)
+        good = mask.compute_AND_mask_py(width, height, xordata)
+        assert mask.check_AND_mask(width, height, xordata, good) is True
+        assert mask.check_AND_mask_py(width, height, xordata, good) is True
+
+        rnd = random.Random(seed)
+        x, y = rnd.randrange(width), rnd.randrange(height)
+        index = y * Iconolatry.calc_rowsize(1, width) + x // 8
+        flipped = bytearray(good)
+        flipped[index] ^= 1 << (7 - x % 8)
+        assert mask.check_AND_mask(width, height, xordata, bytes(flipped)) is False
+        assert mask.check_AND_mask_py(width, height, xordata, bytes(flipped)) is False
+
+        noise = bytes(rnd.getrandbits(8) for _ in range(len(good)))
+        assert mask.check_AND_mask(width, height, xordata, noise) == mask.check_AND_mask_py(width, height, xordata, noise)
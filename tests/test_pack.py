@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import zlib
+from io import BytesIO
+from struct import pack
+
+import pytest
+from PIL import Image
+
+import Iconolatry
+
+golden_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+## Row bytes of these widths need 4-byte padding at 2, 4 and 16 bpp.
+widths = [5, 13, 20]
+# (bits, PNG color type): grayscale is 0, indexed is 3.
+depths = [(2, 0), (2, 3), (4, 0), (4, 3), (16, 0)]
+cases = [(width, bits, coltype) for width in widths for bits, coltype in depths]
+
+def png_chunk(tag, data):
+        """ Makes a PNG chunk. """
+        return pack('>L', len(data)) + tag + data + pack('>L', zlib.crc32(tag + data) & 0xffffffff)
+
+def png_source(width, bits, coltype, height = 3):
+        """ Makes a fixed PNG source with exact bit depth (PIL can't save 2-bit grayscale or 16-bit gray as such). """
+        values = [[(x * 7 + y * 3) % (1 << min(bits, 8)) for x in range(width)] for y in range(height)]
+        if bits == 16:
+                rows = [b''.join(pack('>H', value * 2053 % 65536) for value in row) for row in values]
+        else:
+                rows = []
+                for row in values:
+                        number = 0
+                        for value in row:
+                                number = (number << bits) | value
+                        padbits = -(width * bits) % 8
+                        rows.append((number << padbits).to_bytes((width * bits + padbits) // 8, 'big'))
+
+        data = b'\x89PNG\r\n\x1a\n' + png_chunk(b'IHDR', pack('>2L5B', width, height, bits, coltype, 0, 0, 0))
+        if coltype == 3:
+                data += png_chunk(b'PLTE', bytes(range(3 * (1 << bits))))
+        data += png_chunk(b'IDAT', zlib.compress(b''.join(b'\x00' + row for row in rows)))
+        return data + png_chunk(b'IEND', b'')
+
+def golden_path(width, bits, coltype):
+        """ Defines golden `.ico` path. """
+        return os.path.join(golden_dir, 'pack_{:d}bpp_{}_{:d}px.ico'.format(bits, ('gray' if coltype == 0 else 'indexed'), width))
+
+def encode(width, bits, coltype):
+        """ Encodes fixed source to `.ico` bytes, without resizing. """
+        source = png_source(width, bits, coltype)
+        result = Iconolatry.build_icocur([source], '.ico', type_resize = (width, 3), labels = ['source.png'])
+        assert 'error' not in result, result.get('error')
+        return source, result['data']
+
+@pytest.mark.parametrize('width, bits, coltype', cases)
+def test_pack_golden(width, bits, coltype):
+        """ Packed `.ico` bytes match golden file. """
+        _, data = encode(width, bits, coltype)
+        with open(golden_path(width, bits, coltype), 'rb') as file:
+                assert data == file.read()
+
+@pytest.mark.parametrize('width, bits, coltype', cases)
+def test_pack_roundtrip(width, bits, coltype):
+        """ Decoded `.ico` gives back source pixels (16 bpp keeps 5 bits per channel). """
+        source, data = encode(width, bits, coltype)
+        entry = Iconolatry.parse_icocur(data, 'golden.ico')['image_0']
+        assert isinstance(entry, dict), entry
+        assert entry['depth'] == bits
+
+        image = Image.open(BytesIO(source))
+        if bits == 16:
+                image = image.point(lambda value: value / 256).convert('L')
+        expected = list(image.convert('RGB').getdata())
+        decoded = list(entry['im_obj'].convert('RGB').getdata())
+        tolerance = (7 if bits == 16 else 0)
+        assert entry['im_obj'].size == (width, 3)
+        assert all(abs(a - b) <= tolerance for pixel, other in zip(expected, decoded) for a, b in zip(pixel, other))
+
+
+if __name__ == "__main__":
+        ## Regenerates golden files (from repository root: `PYTHONPATH=. python tests/test_pack.py`).
+        os.makedirs(golden_dir, exist_ok = True)
+        for width, bits, coltype in cases:
+                with open(golden_path(width, bits, coltype), 'wb') as file:
+                        file.write(encode(width, bits, coltype)[1])
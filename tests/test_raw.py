@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import pickle
+
+import pytest
+from PIL import Image
+
+import Iconolatry
+
+def raw_entry():
+        """ Decodes a fixed 32 bpp `.ico` (13x7, rows not aligned) with `raw`, gets its entry. """
+        image = Image.new('RGBA', (13, 7))
+        image.putdata([(x * 19, y * 36, x * y, (x + y) * 14) for y in range(7) for x in range(13)])
+        data = Iconolatry.encode_images([image], type_resize = (13, 7))
+        entry = Iconolatry.parse_icocur(data, 'raw.ico', raw = True)['image_0']
+        assert isinstance(entry, dict), entry
+        return entry
+
+def test_raw_buffer():
+        """ `data` is a read-only buffer of RGBA rows (top-down), viewed without copy. """
+        entry = raw_entry()
+        raw = entry['raw']
+        view = memoryview(raw.data)
+        assert (view.shape, view.format, view.readonly) == ((7, 13, 4), 'B', True)
+        assert view.obj is raw.data.obj
+        assert len(raw) == view.nbytes == 13 * 7 * 4
+        assert view.tobytes() == entry['im_obj'].convert('RGBA').tobytes()
+        if sys.version_info >= (3, 12):
+                assert memoryview(raw).obj is raw.data.obj
+
+def test_raw_numpy():
+        """ `numpy.asarray` of entry (or of its `data`) shares `data` memory. """
+        np = pytest.importorskip('numpy')
+        raw = raw_entry()['raw']
+        base = np.frombuffer(raw.data.obj, np.uint8)
+        for array in (np.asarray(raw), np.asarray(raw.data)):
+                assert array.shape == (7, 13, 4) and array.dtype == np.uint8
+                assert not array.flags.writeable
+                assert np.shares_memory(array, base)
+
+def test_raw_pickle():
+        """ Entry pickles (as with `workers` > 1). """
+        raw = raw_entry()['raw']
+        other = pickle.loads(pickle.dumps(raw))
+        assert (other.width, other.height, other.depth, other.hotspot) == (raw.width, raw.height, raw.depth, raw.hotspot)
+        assert other.data.shape == raw.data.shape and other.data.tobytes() == raw.data.tobytes()
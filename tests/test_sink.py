@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from PIL import Image
+
+import Iconolatry
+
+## Entries of 256 pixels (bitmap: BITMAPINFO header, palette, XOR mask, AND mask chunks).
+count = 3
+
+class Sink(object):
+        """ File-like recording every `write` / `writelines` call. """
+        def __init__(self):
+                self.calls = []
+
+        def write(self, data):
+                self.calls.append(('write', data))
+                return len(data)
+
+        def writelines(self, lines):
+                self.calls.append(('writelines', list(lines)))
+
+def images():
+        """ Makes fixed 256 pixels RGBA images. """
+        gradient = Image.linear_gradient('L')
+        return [Image.merge('RGBA', (gradient.rotate(step * 30), gradient.rotate(90), Image.radial_gradient('L'), gradient.rotate(45)))
+                for step in range(count)]
+
+def check_chunked(sink, data):
+        """ Sink got header, then image data, as lists of chunks (never whole file joined). """
+        assert [kind for kind, _ in sink.calls] == ['writelines', 'writelines']
+        (_, header), (_, chunks) = sink.calls
+        # ICONDIR, then one ICONDIRENTRY for every entry.
+        assert len(header) == 1 + count
+        assert len(chunks) == 4 * count
+        assert max(len(chunk) for chunk in chunks) < len(data) // count
+        assert b"".join(header + chunks) == data
+
+def test_encode_images_sink():
+        """ `encode_images` streams chunks to sink. """
+        data = Iconolatry.encode_images(images())
+        sink = Sink()
+        assert Iconolatry.encode_images(images(), sink = sink) is None
+        check_chunked(sink, data)
+
+def test_encode_sink():
+        """ `Encode` (multi `.ico`) streams chunks to sink through `printsave`. """
+        data = Iconolatry.encode_images(images())
+        sink = Sink()
+        Iconolatry.Encode([images()], names_icocur = ['multi'], formats_icocur = ['.ico'], sink = sink)
+        check_chunked(sink, data)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+from shutil import which
+from struct import unpack_from
+
+import pytest
+from PIL import Image
+
+import Metamorphosis
+
+golden_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+golden_xcursor = os.path.join(golden_dir, 'xcursor_native')
+comments = [(1, 'Metamorphosis'), (3, 'golden cursor')]
+
+def frame_image(size, step):
+        """ Makes a fixed RGBA frame, with alpha ramp (premultiply is exercised). """
+        image = Image.new('RGBA', (size, size))
+        image.putdata([((x * 8 + step * 40) % 256, (y * 8) % 256, (x * y + step) % 256, (x + y) * 255 // (2 * size - 2))
+                       for y in range(size) for x in range(size)])
+        return image
+
+def write_frames(folder):
+        """ Saves frames (two sizes, two animation steps) and their config file, as `xcursorgen` wants. """
+        lines = []
+        for size in [32, 48]:
+                for step in range(2):
+                        path = os.path.join(folder, 'frame{:d}-{:d}.png'.format(size, step))
+                        frame_image(size, step).save(path)
+                        lines.append('{:d} {:d} {:d} {} {:d}'.format(size, size // 8, size // 4, path, 50 + step * 25))
+        path_cfg = os.path.join(folder, 'cursor.cfg')
+        with open(path_cfg, 'w') as file:
+                file.write('\n'.join(lines) + '\n')
+        return path_cfg
+
+def writer(with_comments = True):
+        """ Gets `X11` writer with a minimal process. """
+        process = Metamorphosis.Process({'pack' : False, 'backend' : 'native'})
+        process.frames = {}
+        parameters = {'index' : 0, 'comments' : (comments if with_comments else [])}
+        return Metamorphosis.X11Cur(parameters, process)
+
+def native(folder, with_comments = True):
+        """ Writes `X11` cursor by native writer, gets its bytes. """
+        path_cfg, path_out = write_frames(folder), os.path.join(folder, 'native')
+        assert writer(with_comments).write_native(path_cfg, path_out)
+        with open(path_out, 'rb') as file:
+                return file.read()
+
+def test_native_golden(tmp_path):
+        """ Native writer output matches golden file. """
+        with open(golden_xcursor, 'rb') as file:
+                assert native(str(tmp_path)) == file.read()
+
+def test_native_layout(tmp_path):
+        """ Native writer output follows Xcursor file format (tocs, chunks, ARGB premultiplied pixels). """
+        data = native(str(tmp_path))
+        magic, header, version, ntocs = unpack_from('<4s3L', data, 0)
+        assert (magic, header, version, ntocs) == (b'Xcur', 16, 0x10000, 4 + len(comments))
+
+        tocs = [unpack_from('<3L', data, 16 + 12 * index) for index in range(ntocs)]
+        images = [(size, step) for size in [32, 48] for step in range(2)]
+        for (kind, subtype, position), (size, step) in zip(tocs, images):
+                assert (kind, subtype) == (0xfffd0002, size)
+                chunk = unpack_from('<9L', data, position)
+                assert chunk == (36, 0xfffd0002, size, 1, size, size, size // 8, size // 4, 50 + step * 25)
+                pixels = data[position + 36 : position + 36 + size * size * 4]
+                for (b, g, r, a), (sr, sg, sb, sa) in zip(zip(*[iter(pixels)] * 4), frame_image(size, step).getdata()):
+                        assert (r, g, b, a) == (sr * sa // 255, sg * sa // 255, sb * sa // 255, sa)
+
+        for (kind, subtype, position), (cmt_type, text) in zip(tocs[len(images) :], comments):
+                assert (kind, subtype) == (0xfffe0001, cmt_type)
+                length = unpack_from('<5L', data, position)[4]
+                assert data[position + 20 : position + 20 + length] == text.encode('utf-8')
+
+@pytest.mark.skipif(not which('xcursorgen'), reason = "`xcursorgen` not installed")
+def test_native_as_xcursorgen(tmp_path):
+        """ Native writer and `xcursorgen` give same bytes (`xcursorgen` writes no comments). """
+        folder = str(tmp_path)
+        data = native(folder, with_comments = False)
+        path_out = os.path.join(folder, 'xcursorgen')
+        assert writer(with_comments = False).write_xcursorgen(os.path.join(folder, 'cursor.cfg'), path_out)
+        with open(path_out, 'rb') as file:
+                assert data == file.read()
+
+
+if __name__ == "__main__":
+        ## Regenerates golden file (from repository root: `PYTHONPATH=. python tests/test_xcursor.py`).
+        from tempfile import TemporaryDirectory
+        os.makedirs(golden_dir, exist_ok = True)
+        with TemporaryDirectory() as folder, open(golden_xcursor, 'wb') as file:
+                file.write(native(folder))